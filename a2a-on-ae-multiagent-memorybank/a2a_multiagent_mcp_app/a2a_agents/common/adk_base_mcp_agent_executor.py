@@ -12,11 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # Author: Dave Wang
+import asyncio
 import logging
 import os
 import time
 from abc import ABC, abstractmethod
-from typing import Dict, NoReturn, Optional
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, NoReturn, Optional, Tuple
+
+import httpx
 
 from a2a.server.agent_execution import AgentExecutor, RequestContext
 from a2a.server.events import EventQueue
@@ -29,17 +34,28 @@ from google.adk import Runner
 from google.adk.agents import LlmAgent
 from google.adk.artifacts import InMemoryArtifactService
 from google.adk.memory import VertexAiMemoryBankService
-from google.adk.sessions import VertexAiSessionService
+from google.adk.memory.base_memory_service import SearchMemoryResponse
+from google.adk.memory.memory_entry import MemoryEntry
 import vertexai # Added import for vertexai
-from google.adk.tools.mcp_tool.mcp_toolset import (
-    McpToolset,
-    StreamableHTTPConnectionParams,
-)
+from google.adk.tools.mcp_tool.mcp_toolset import StreamableHTTPConnectionParams
 from google.auth import exceptions as google_auth_exceptions
+from google.auth import jwt as google_jwt
 from google.auth.transport import requests as google_auth_requests
 from google.genai import types
 from google.oauth2 import id_token as google_id_token
 
+from common.auth_utils import OidcTokenAuth
+from common.context_locks import ContextLockRegistry
+from common.in_process_mcp import InProcessConnectionParams, load_fastmcp_server
+from common.mcp_session_pool import PooledMcpToolset
+from common.memory_scheduler import MemoryGenerationScheduler
+from common.memory_search_cache import MemorySearchCache
+from common.session_compaction import SessionCompactor
+from common.session_index import create_session_index
+from common.session_pool import SessionPool
+from common.windowed_session_service import WindowedVertexAiSessionService
+from common.tool_result_cache import ToolResultCache
+
 # Imports for MemoryBankCustomizationConfig
 from vertexai._genai.types import MemoryBankCustomizationConfig as CustomizationConfig
 from vertexai._genai.types import MemoryBankCustomizationConfigMemoryTopic as MemoryTopic
@@ -52,6 +68,19 @@ from vertexai.preview.reasoning_engines.templates.adk import (
 )
 
 
+# Session state key holding the memory generation watermark, see
+# PersistentVertexAiMemoryBankService
+MEMORY_WATERMARK_STATE_KEY = "memory_watermark"
+DEFAULT_MAX_MEMORY_WATERMARKS = int(os.getenv("MEMORY_WATERMARK_MAX_SESSIONS", "4096"))
+# Connection pool of the Memory Bank client, shared by the process
+MEMORY_BANK_MAX_CONNECTIONS = int(os.getenv("MEMORY_BANK_MAX_CONNECTIONS", "20"))
+MEMORY_BANK_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.getenv("MEMORY_BANK_MAX_KEEPALIVE_CONNECTIONS", "10")
+)
+# Added to the newest event's timestamp to make the exclusive end_time cover it
+_EVENT_TIME_RESOLUTION_SECONDS = 0.001
+
+
 def _telemetry_enabled() -> Optional[bool]:
     """Return status of telemetry enablement depending on enablement env variable."""
     env_value = os.getenv(
@@ -118,11 +147,26 @@ class PersistentVertexAiMemoryBankService(VertexAiMemoryBankService):
     deployed Agent Engine environments.
 
     This subclass maintains a single persistent Client (and thus API client) for the
-    lifetime of the service, preventing premature httpx client closure.
+    lifetime of the process, preventing premature httpx client closure. Memory
+    generation and search go through the Client's async surface (client.aio), so
+    they never block the event loop, over one connection pool per project and
+    location whose size is set by MEMORY_BANK_MAX_CONNECTIONS and
+    MEMORY_BANK_MAX_KEEPALIVE_CONNECTIONS. Search results are cached per user for
+    a short TTL (see memory_search_cache.py).
+
+    Memory generation is incremental: each session has a watermark, the timestamp
+    of the newest event covered by the last completed generation, and only
+    later events are submitted. Generations are awaited until Memory Bank
+    finishes them; a failed one leaves the watermark in place and raises. The watermark is kept locally and, through
+    MEMORY_WATERMARK_STATE_KEY, in session state for other replicas.
     """
 
     def __init__(
-        self, project: str = None, location: str = None, agent_engine_id: str = None
+        self,
+        project: str = None,
+        location: str = None,
+        agent_engine_id: str = None,
+        max_watermarks: int = DEFAULT_MAX_MEMORY_WATERMARKS,
     ):
         super().__init__(
             project=project, location=location, agent_engine_id=agent_engine_id
@@ -130,26 +174,72 @@ class PersistentVertexAiMemoryBankService(VertexAiMemoryBankService):
         # Create and cache both the Client and API client once
         self._persistent_client = None
         self._persistent_api_client = None
+        self.max_watermarks = max_watermarks
+        # Session ID -> watermark, least recently used first
+        self._watermarks: "OrderedDict[str, float]" = OrderedDict()
+        # Recent search results per user, for PreloadMemoryTool
+        self.search_cache = MemorySearchCache()
+
+    # Clients shared by all memory services of the process, by (project, location)
+    _CLIENTS: Dict[Tuple[str, str], vertexai.Client] = {}
 
     def _get_api_client(self):
         """Override to return a persistent API client instead of creating new ones."""
         if self._persistent_api_client is None:
             # Keep the Client object alive to prevent httpx client closure
-            self._persistent_client = vertexai.Client(
-                project=self._project, location=self._location
-            )
+            key = (self._project, self._location)
+            if key not in self._CLIENTS:
+                self._CLIENTS[key] = vertexai.Client(
+                    project=self._project,
+                    location=self._location,
+                    http_options=types.HttpOptions(
+                        # A custom transport also makes the SDK use httpx
+                        # rather than aiohttp, so the limits always apply
+                        async_client_args={
+                            "transport": httpx.AsyncHTTPTransport(
+                                limits=httpx.Limits(
+                                    max_connections=MEMORY_BANK_MAX_CONNECTIONS,
+                                    max_keepalive_connections=MEMORY_BANK_MAX_KEEPALIVE_CONNECTIONS,
+                                )
+                            )
+                        }
+                    ),
+                )
+            self._persistent_client = self._CLIENTS[key]
             self._persistent_api_client = self._persistent_client
         return self._persistent_api_client
 
+    def watermark(self, session: adk.sessions.Session) -> Optional[float]:
+        """Timestamp of the newest event of the session already submitted."""
+        watermarks = [
+            w
+            for w in (
+                self._watermarks.get(session.id),
+                session.state.get(MEMORY_WATERMARK_STATE_KEY),
+            )
+            if w is not None
+        ]
+        return max(watermarks) if watermarks else None
+
     async def add_session_to_memory(self, session: adk.sessions.Session):
         client = self._get_api_client()
         agent_engine_name = (
             f"projects/{self._project}/locations/{self._location}/"
             f"reasoningEngines/{self._agent_engine_id}"
         )
+        watermark = self.watermark(session)
+        new_events = [
+            event
+            for event in session.events
+            if watermark is None or event.timestamp > watermark
+        ]
+        if not new_events:
+            logging.info(f"No new events in session {session.id} since the last memory generation.")
+            return
+
         # Convert ADK session events to the format expected by Agent Engine SDK
         events_for_memory_bank = []
-        for event in session.events:
+        for event in new_events:
             if event.content and event.content.parts:
                 # Assuming simple text parts for now
                 text_content = " ".join([p.text for p in event.content.parts if p.text])
@@ -158,7 +248,10 @@ class PersistentVertexAiMemoryBankService(VertexAiMemoryBankService):
                         "content": {"role": event.author, "parts": [{"text": text_content}]}
                     })
 
+        newest = max(event.timestamp for event in new_events)
         if not events_for_memory_bank:
+            # Nothing to remember, so later generations can skip these too
+            self._set_watermark(session.id, newest)
             logging.info(f"No meaningful events in session {session.id} for memory generation.")
             return
 
@@ -166,24 +259,90 @@ class PersistentVertexAiMemoryBankService(VertexAiMemoryBankService):
             f"projects/{self._project}/locations/{self._location}/"
             f"reasoningEngines/{self._agent_engine_id}/sessions/{session.id}"
         )
-        logging.info(f"Memory generation for session: {session_resource_name}")
+        logging.info(
+            f"Memory generation for session: {session_resource_name} from "
+            f"{len(events_for_memory_bank)} new events"
+        )
 
-        logging.info(f"Events for memory bank: {events_for_memory_bank}")
-        operation = client.agent_engines.memories.generate(
+        operation = await client.aio.agent_engines.memories.generate(
             name=agent_engine_name,
             vertex_session_source={
-                "session": (
-                    f"projects/{self._project}/locations/{self._location}/"
-                    f"reasoningEngines/{self._agent_engine_id}/sessions/{session.id}"
-                )
+                "session": session_resource_name,
+                # Only the events after the watermark, up to the newest one;
+                # end_time is exclusive
+                "start_time": datetime.fromtimestamp(
+                    min(event.timestamp for event in new_events), tz=timezone.utc
+                ),
+                "end_time": datetime.fromtimestamp(
+                    newest + _EVENT_TIME_RESOLUTION_SECONDS, tz=timezone.utc
+                ),
             },
-            config={"wait_for_completion": False},
+            # Generation runs on the scheduler's workers, so waiting is cheap,
+            # and the watermark only moves past events Memory Bank processed
+            config={"wait_for_completion": True},
         )
-        logging.info(f"Memory generation operation: {operation.name}")
+        if operation.error:
+            # Keep the watermark, so the scheduler's retry submits them again
+            raise RuntimeError(
+                f"Memory generation {operation.name} failed: {operation.error}"
+            )
+        self._set_watermark(session.id, newest)
+        # Memory Bank has stored the new memories, so later searches see them
+        self.search_cache.invalidate(session.app_name, session.user_id)
+        logging.info(f"Memory generation operation completed: {operation.name}")
+
+    async def search_memory(self, *, app_name: str, user_id: str, query: str):
+        """Retrieve the user's memories most similar to the query."""
+        cached = self.search_cache.get(app_name, user_id, query)
+        if cached is not None:
+            return cached
+        started_at = time.monotonic()
+        client = self._get_api_client()
+        agent_engine_name = (
+            f"projects/{self._project}/locations/{self._location}/"
+            f"reasoningEngines/{self._agent_engine_id}"
+        )
+        retrieved_memories = await client.aio.agent_engines.memories.retrieve(
+            name=agent_engine_name,
+            scope={"app_name": app_name, "user_id": user_id},
+            similarity_search_params={"search_query": query},
+        )
+        memory_events = []
+        async for retrieved_memory in retrieved_memories:
+            memory_events.append(
+                MemoryEntry(
+                    author="user",
+                    content=types.Content(
+                        parts=[types.Part(text=retrieved_memory.memory.fact)],
+                        role="user",
+                    ),
+                    timestamp=retrieved_memory.memory.update_time.isoformat(),
+                )
+            )
+        response = SearchMemoryResponse(memories=memory_events)
+        self.search_cache.put(app_name, user_id, query, response, started_at)
+        return response
+
+    def _set_watermark(self, session_id: str, watermark: float) -> None:
+        self._watermarks[session_id] = watermark
+        self._watermarks.move_to_end(session_id)
+        while len(self._watermarks) > self.max_watermarks:
+            self._watermarks.popitem(last=False)
 
 
 class TokenManager:
-    """Manages OIDC token with automatic refresh on expiry."""
+    """Manages an OIDC token, refreshing it in the background before it expires.
+
+    The token is minted in a worker thread, since fetch_id_token may block on
+    the metadata server, and its real expiry is read from the JWT "exp" claim.
+    Requests only wait for a token when none is valid yet; otherwise they get
+    the cached one while a single background refresh replaces it.
+    """
+
+    # Lifetime assumed when a token's exp claim cannot be read
+    DEFAULT_LIFETIME_SECONDS = 3600
+    # Delay before retrying a failed background refresh
+    RETRY_DELAY_SECONDS = 30
 
     def __init__(self, audience: str, refresh_buffer_seconds: int = 300):
         """
@@ -198,36 +357,92 @@ class TokenManager:
         self.refresh_buffer_seconds = refresh_buffer_seconds
         self._token = None
         self._expiry = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._background_task: Optional[asyncio.Task] = None
 
-    def get_headers(self) -> Dict[str, str]:
+    async def get_headers(self) -> Dict[str, str]:
         """
         Get authorization headers with a fresh or cached token.
 
         Returns:
             Dictionary with Authorization header, or empty dict if auth unavailable.
         """
-        current_time = time.time()
-
-        # Refresh if token is None or about to expire
-        if self._token is None or self._expiry is None or current_time >= self._expiry:
-            headers = get_gcp_auth_headers(self.audience)
-            auth_header = headers.get("Authorization")
-
-            if auth_header:
-                self._token = auth_header
-                # ID tokens typically expire in 1 hour (3600 seconds)
-                # Refresh 5 minutes (300 seconds) before expiry by default
-                self._expiry = current_time + 3600 - self.refresh_buffer_seconds
-                logging.info(
-                    f"TokenManager: Refreshed token, next refresh at {self._expiry}"
-                )
-            else:
-                # No token available
+        if not self._is_valid():
+            await self.refresh()
+        self._ensure_background_refresh()
+        return {"Authorization": self._token} if self._token else {}
+
+    async def refresh(self) -> None:
+        """Fetches a new token, joining a refresh that is already in flight."""
+        if not self._is_running(self._refresh_task):
+            self._refresh_task = asyncio.create_task(self._fetch_token())
+        # Shield so a cancelled request does not cancel the shared refresh
+        await asyncio.shield(self._refresh_task)
+
+    def _is_valid(self) -> bool:
+        return self._token is not None and time.time() < self._expiry
+
+    @staticmethod
+    def _is_running(task: Optional[asyncio.Task]) -> bool:
+        """Whether a task is still pending on the current event loop."""
+        return (
+            task is not None
+            and not task.done()
+            and task.get_loop() is asyncio.get_running_loop()
+        )
+
+    def _ensure_background_refresh(self) -> None:
+        """Starts the proactive refresh loop on the running event loop."""
+        if not self._is_running(self._background_task):
+            self._background_task = asyncio.create_task(
+                self._refresh_before_expiry()
+            )
+
+    async def _refresh_before_expiry(self) -> None:
+        """Refreshes the token refresh_buffer_seconds before each expiry."""
+        while True:
+            if self._token is None:
+                # Auth is unavailable (e.g. local dev); get_headers retries
+                return
+            now = time.time()
+            refresh_at = self._expiry - self.refresh_buffer_seconds
+            # Tokens shorter-lived than the buffer refresh at half their life
+            await asyncio.sleep(max(refresh_at - now, (self._expiry - now) / 2, 0))
+            previous_token = self._token
+            try:
+                await self.refresh()
+            except Exception as e:
+                logging.error(f"TokenManager: Background refresh failed: {e}")
+            if self._token == previous_token or self._token is None:
+                await asyncio.sleep(self.RETRY_DELAY_SECONDS)
+
+    async def _fetch_token(self) -> None:
+        """Mints a token off the event loop and records its expiry."""
+        headers = await asyncio.to_thread(get_gcp_auth_headers, self.audience)
+        auth_header = headers.get("Authorization")
+        if not auth_header:
+            if not self._is_valid():
                 self._token = None
                 self._expiry = None
+            return
 
-        # Return current token
-        return {"Authorization": self._token} if self._token else {}
+        self._token = auth_header
+        self._expiry = self._read_expiry(auth_header.removeprefix("Bearer "))
+        logging.info(
+            f"TokenManager: Refreshed token for {self.audience}, expires at "
+            f"{self._expiry:.0f}"
+        )
+
+    def _read_expiry(self, token: str) -> float:
+        """Reads the exp claim of a JWT, without verifying its signature."""
+        try:
+            return float(google_jwt.decode(token, verify=False)["exp"])
+        except Exception as e:
+            logging.warning(
+                f"TokenManager: Could not read token expiry ({e}), assuming "
+                f"{self.DEFAULT_LIFETIME_SECONDS} seconds"
+            )
+            return time.time() + self.DEFAULT_LIFETIME_SECONDS
 
 
 class AdkBaseMcpAgentExecutor(AgentExecutor, ABC):
@@ -240,12 +455,14 @@ class AdkBaseMcpAgentExecutor(AgentExecutor, ABC):
     4. Error handling and recovery
     5. MCP authentication and token management
     """
-    # In-memory cache for mapping A2A context_id to ADK session objects.
-    # Note: For a production system, a more robust, distributed cache like Redis
-    # or Memorystore would be necessary to handle multiple server instances and
-    # to manage memory by evicting old sessions. For this demo, a simple
-    # dictionary is sufficient.
-    CONTEXT_ID_TO_SESSION_MAP = {}
+    # Index mapping A2A context_id to ADK session IDs, shared by all executor
+    # instances in the process. Only IDs are kept; the session service owns the
+    # sessions themselves. Set SESSION_INDEX_REDIS_URL to share the index
+    # across replicas through Redis or Memorystore.
+    SESSION_INDEX = create_session_index()
+    # One lock per context, so turns of a conversation never overlap on their
+    # session while different contexts run in parallel.
+    CONTEXT_LOCKS = ContextLockRegistry()
 
     def __init__(self, agent_engine_id: str = None) -> None:
         """Initialize with lazy loading pattern.
@@ -256,6 +473,10 @@ class AdkBaseMcpAgentExecutor(AgentExecutor, ABC):
         self.agent = None
         self.runner = None
         self.token_manager = None
+        self.tool_result_cache = None
+        self.session_compactor = None
+        self.memory_scheduler = None
+        self.session_pool = None
         self.agent_engine_id = agent_engine_id
 
         self.project_id = os.environ.get("PROJECT_ID")
@@ -277,6 +498,8 @@ class AdkBaseMcpAgentExecutor(AgentExecutor, ABC):
 
         Returns:
             Dict with keys: name, description, instruction, model, mcp_url_env_var
+            and optionally tool_cache_ttl_seconds, mcp_transport,
+            mcp_server_module and mcp_server_dir
         """
         pass
 
@@ -330,64 +553,56 @@ class AdkBaseMcpAgentExecutor(AgentExecutor, ABC):
                 agent_engine_id=self.agent_engine_id,
             )
 
-            my_session_service = VertexAiSessionService(
+            # Loads only the recent events of a session, incrementally
+            my_session_service = WindowedVertexAiSessionService(
                 project=os.environ.get("PROJECT_ID"),
                 location=os.environ.get("LOCATION"),
                 agent_engine_id=self.agent_engine_id,
             )
 
-            # --- Environment setup ---
-            mcp_url = os.getenv(config["mcp_url_env_var"])
-
-            if not mcp_url:
-                raise ValueError(
-                    f"Required environment variable '{config['mcp_url_env_var']}' is not set. "
-                    f"Please set it to the MCP server URL for {config['name']}."
-                )
-
-            # Initialize token manager for automatic token refresh
-            self.token_manager = TokenManager(audience=mcp_url)
-            mcp_auth_headers = self.token_manager.get_headers()
-
-            mcp_server_params = StreamableHTTPConnectionParams(
-                url=mcp_url,
-                headers=mcp_auth_headers,
-            )
+            # --- MCP tools, over HTTP or mounted in-process ---
+            mcp_toolset = self._build_mcp_toolset(config)
 
             async def auto_save_session_to_memory_callback(callback_context):
                 """
                 Callback to save conversation session to Vertex AI Memory Bank.
 
                 This callback is triggered after the agent completes processing.
-                It extracts conversation events from the session and sends them to
-                the Memory Bank service for processing. The service generates semantic
+                It hands the session to the memory generation scheduler, which
+                coalesces the turns of a session and sends the new events to
+                the Memory Bank service once the conversation goes idle or
+                enough turns are pending. The service generates semantic
                 memories that can be retrieved in future conversations.
 
                 Memory topics are configured in the agent engine (see get_agent_engine method).
                 Subclasses can override get_agent_engine to customize memory topics.
                 """
-                memory_callback_start_time = time.time()
                 session = callback_context._invocation_context.session
                 memory_service = callback_context._invocation_context.memory_service
 
                 logging.info(
-                    f"Saving session {session.id} to memory bank for "
+                    f"Scheduling memory generation for session {session.id}, "
                     f"user_id={session.user_id}"
                 )
+                self.memory_scheduler.schedule(memory_service, session)
+
+                # Record the watermark of generations finished since the last turn
+                watermark = memory_service.watermark(session)
+                if watermark != session.state.get(MEMORY_WATERMARK_STATE_KEY):
+                    # Persisted with the after_agent_callback's state delta
+                    callback_context.state[MEMORY_WATERMARK_STATE_KEY] = watermark
+
+            # Memoize MCP tool results for the per-tool TTLs in the config
+            self.tool_result_cache = ToolResultCache(
+                config.get("tool_cache_ttl_seconds", {})
+            )
+
+            # Replace old conversation history with a rolling summary
+            self.session_compactor = SessionCompactor()
+
+            # Generate memories once per burst of turns, not after every turn
+            self.memory_scheduler = MemoryGenerationScheduler()
 
-                try:
-                    await memory_service.add_session_to_memory(session)
-                    logging.info(
-                        f"Memory generation completed for session {session.id}"
-                    )
-                except Exception as e:
-                    logging.error(
-                        f"Memory generation failed for session {session.id}: {e}",
-                        exc_info=True,
-                    )
-                finally:
-                    memory_callback_end_time = time.time()
-                    logging.info(f"Memory generation callback time for session {session.id} (user {session.user_id}): {memory_callback_end_time - memory_callback_start_time:.2f} seconds")
             # Create the actual agent
             self.agent = LlmAgent(
                 model=config.get("model", "gemini-2.5-flash"),
@@ -395,12 +610,13 @@ class AdkBaseMcpAgentExecutor(AgentExecutor, ABC):
                 description=config["description"],
                 instruction=config["instruction"],
                 tools=[
-                    McpToolset(
-                        connection_params=mcp_server_params,
-                    ),
+                    mcp_toolset,
                     adk.tools.preload_memory_tool.PreloadMemoryTool(),
                 ],
+                before_model_callback=self.session_compactor.before_model_callback,
                 after_agent_callback=auto_save_session_to_memory_callback,
+                before_tool_callback=self.tool_result_cache.before_tool_callback,
+                after_tool_callback=self.tool_result_cache.after_tool_callback,
             )
 
             # The Runner orchestrates the agent execution
@@ -416,6 +632,52 @@ class AdkBaseMcpAgentExecutor(AgentExecutor, ABC):
                 session_service=my_session_service,
                 memory_service=my_memory_service,
             )
+            # Sessions created ahead of time, so new conversations skip
+            # the create_session round trip
+            self.session_pool = SessionPool(my_session_service, self.runner.app_name)
+
+    def _build_mcp_toolset(self, config: Dict) -> PooledMcpToolset:
+        """
+        Build the MCP toolset for the transport selected in the agent config.
+
+        "http" (the default) connects to the Cloud Run server named by
+        mcp_url_env_var. "in_process" imports mcp_server_module from
+        mcp_server_dir and calls its FastMCP server over in-memory streams.
+        Both keep one MCP session open across turns instead of re-running
+        the initialize handshake per invocation.
+        """
+        transport = config.get("mcp_transport", "http")
+        if transport == "in_process":
+            server = load_fastmcp_server(
+                config["mcp_server_module"], config.get("mcp_server_dir")
+            )
+            return PooledMcpToolset(
+                connection_params=InProcessConnectionParams(server=server)
+            )
+        if transport != "http":
+            raise ValueError(
+                f"Unknown mcp_transport '{transport}' for {config['name']}, "
+                "expected 'http' or 'in_process'."
+            )
+
+        # --- Environment setup ---
+        mcp_url = os.getenv(config["mcp_url_env_var"])
+
+        if not mcp_url:
+            raise ValueError(
+                f"Required environment variable '{config['mcp_url_env_var']}' is not set. "
+                f"Please set it to the MCP server URL for {config['name']}."
+            )
+
+        # Initialize token manager for automatic token refresh. Its token
+        # is added to each MCP request by an httpx auth hook, so
+        # concurrent executions never touch shared connection headers.
+        self.token_manager = TokenManager(audience=mcp_url)
+
+        return PooledMcpToolset(
+            connection_params=StreamableHTTPConnectionParams(url=mcp_url),
+            auth=OidcTokenAuth(self.token_manager),
+        )
 
     async def execute(
         self,
@@ -461,46 +723,48 @@ class AdkBaseMcpAgentExecutor(AgentExecutor, ABC):
             # Mark task as working (processing)
             await updater.start_work()
 
-            # Refresh MCP authentication headers before executing
-            self._refresh_mcp_auth()
-
-            # Get or create a session for this conversation
-            session = await self._get_or_create_session(context.context_id, user_id=user_id)
-            logging.info(f"Using session: {session.id} for user: {user_id}")
-
-            # Prepare the user message in ADK format
-            content = types.Content(role=Role.user, parts=[types.Part(text=query)])
-
-            # Run the agent asynchronously
-            # This may involve multiple LLM calls and tool uses
-            runner_start_time = time.time()
-            answer_sent = False
-            async for event in self.runner.run_async(
-                session_id=session.id,
-                user_id=user_id,  # Use the parsed user ID
-                new_message=content,
-            ):
-                # The agent may produce multiple events
-                # We're interested in the final response
-                if event.is_final_response() and not answer_sent:
-                    # Extract the answer text from the response
-                    answer = self._extract_answer(event)
-                    logging.info(f" {answer}")
-
-                    # Add the answer as an artifact
-                    # Artifacts are the "outputs" or "results" of a task
-                    # They're separate from status messages
-                    await updater.add_artifact(
-                        [TextPart(text=answer)],
-                        name="answer",  # Name helps clients identify artifacts
-                    )
-
-                    # Mark task as completed successfully
-                    await updater.complete()
-                    answer_sent = True
-                    # Don't break - continue consuming events to allow callbacks to execute
-            runner_end_time = time.time()
-            logging.info(f"ADK Runner execution time for task {context.task_id}: {runner_end_time - runner_start_time:.2f} seconds")
+            # Serialize turns of this conversation; other contexts run in parallel
+            async with self.CONTEXT_LOCKS.lock(f"{self.runner.app_name}:{context.context_id}"):
+                # Get or create a session for this conversation
+                session_id = await self._get_or_create_session(context.context_id, user_id=user_id)
+                logging.info(f"Using session: {session_id} for user: {user_id}")
+
+                # Prepare the user message in ADK format
+                content = types.Content(role=Role.user, parts=[types.Part(text=query)])
+                # Retags a claimed pre-created session along with the message
+                state_delta = self.session_pool.claimed_state_delta(session_id)
+
+                # Run the agent asynchronously
+                # This may involve multiple LLM calls and tool uses
+                runner_start_time = time.time()
+                answer_sent = False
+                async for event in self.runner.run_async(
+                    session_id=session_id,
+                    user_id=user_id,  # Use the parsed user ID
+                    new_message=content,
+                    state_delta=state_delta,
+                ):
+                    # The agent may produce multiple events
+                    # We're interested in the final response
+                    if event.is_final_response() and not answer_sent:
+                        # Extract the answer text from the response
+                        answer = self._extract_answer(event)
+                        logging.info(f" {answer}")
+
+                        # Add the answer as an artifact
+                        # Artifacts are the "outputs" or "results" of a task
+                        # They're separate from status messages
+                        await updater.add_artifact(
+                            [TextPart(text=answer)],
+                            name="answer",  # Name helps clients identify artifacts
+                        )
+
+                        # Mark task as completed successfully
+                        await updater.complete()
+                        answer_sent = True
+                        # Don't break - continue consuming events to allow callbacks to execute
+                runner_end_time = time.time()
+                logging.info(f"ADK Runner execution time for task {context.task_id}: {runner_end_time - runner_start_time:.2f} seconds")
 
         except Exception as e:
             # Errors should never pass silently (Zen of Python)
@@ -515,39 +779,26 @@ class AdkBaseMcpAgentExecutor(AgentExecutor, ABC):
             end_time = time.time()
             logging.info(f"Total execute time for task {context.task_id}: {end_time - start_time:.2f} seconds")
 
-    def _refresh_mcp_auth(self) -> None:
-        """Refresh MCP authentication headers using the token manager."""
-        if self.token_manager is None:
-            logging.warning("TokenManager not initialized, skipping auth refresh")
-            return
-
-        # Get fresh headers from token manager (will auto-refresh if expired)
-        fresh_headers = self.token_manager.get_headers()
-
-        # Update the toolset connection params (using private attribute)
-        for tool in self.agent.tools:
-            if isinstance(tool, McpToolset):
-                # Access private attribute to update headers
-                if hasattr(tool._connection_params, "headers"):
-                    tool._connection_params.headers = fresh_headers
-                    logging.debug("Refreshed MCP authentication headers")
-
-    async def _get_or_create_session(self, context_id: str, user_id: str):
-        """Get existing session from cache or create a new one."""
+    async def _get_or_create_session(self, context_id: str, user_id: str) -> str:
+        """Get the session ID for a context from the index, or create a session."""
         session_start_time = time.time()
-        if context_id in self.CONTEXT_ID_TO_SESSION_MAP:
+        index_key = f"{self.runner.app_name}:{context_id}"
+        session_id = await self.SESSION_INDEX.get(index_key)
+        if session_id is not None:
             logging.info(f"Found existing session for context {context_id}.")
-            session = self.CONTEXT_ID_TO_SESSION_MAP[context_id]
         else:
-            logging.info(f"Creating new session for context {context_id}.")
-            session = await self.runner.session_service.create_session(
-                app_name=self.runner.app_name,
-                user_id=user_id,
-            )
-            self.CONTEXT_ID_TO_SESSION_MAP[context_id] = session
+            logging.info(f"Claiming new session for context {context_id}.")
+            claimed_id = await self.session_pool.claim(user_id)
+            session_id = await self.SESSION_INDEX.put(index_key, claimed_id)
+            if session_id != claimed_id:
+                # Another replica created a session for this context first
+                logging.info(f"Using session {session_id} indexed by another replica.")
+                self.session_pool.release(user_id, claimed_id)
+            logging.info(f"Session pool metrics: {self.session_pool.metrics()}")
         session_end_time = time.time()
         logging.info(f"Session management time for context {context_id}: {session_end_time - session_start_time:.2f} seconds")
-        return session
+        logging.info(f"Session index metrics: {self.SESSION_INDEX.metrics()}")
+        return session_id
 
     def _extract_answer(self, event) -> str:
         """Extract text answer from agent response."""
@@ -39,7 +39,13 @@ from google.adk.agents.readonly_context import ReadonlyContext
 from google.adk.tools.tool_context import ToolContext
 from google.genai import types
 
+from common.adk_base_mcp_agent_executor import (
+    MEMORY_WATERMARK_STATE_KEY,
+    PersistentVertexAiMemoryBankService,
+)
+from common.memory_scheduler import MemoryGenerationScheduler
 from common.remote_connection import RemoteAgentConnections, TaskUpdateCallback
+from common.session_compaction import SessionCompactor
 
 # from google.adk.models.lite_llm import LiteLlm
 
@@ -48,35 +54,6 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 
-async def auto_save_session_to_memory_callback(callback_context: CallbackContext):
-    """
-    Callback to save conversation session to Vertex AI Memory Bank.
-
-    This callback is triggered after the agent completes processing.
-    It extracts conversation events from the session and sends them to
-    the Memory Bank service for processing. The service generates semantic
-    memories that can be retrieved in future conversations.
-
-    Args:
-        callback_context: The callback context containing session and memory service.
-    """
-    session = callback_context._invocation_context.session
-    memory_service = callback_context._invocation_context.memory_service
-
-    logging.info(
-        f"Saving session {session.id} to memory bank for user_id={session.user_id}"
-    )
-
-    try:
-        await memory_service.add_session_to_memory(session)
-        logging.info(f"Memory generation completed for session {session.id}")
-    except Exception as e:
-        logging.error(
-            f"Memory generation failed for session {session.id}: {e}",
-            exc_info=True,
-        )
-
-
 class AdkOrchestratorAgent:
     """The orchestrator agent.
 
@@ -113,6 +90,10 @@ class AdkOrchestratorAgent:
         self.agents: str = ""
         self._init_task = None
         self._remote_agent_addresses = remote_agent_addresses
+        # Replaces old conversation history with a rolling summary
+        self.session_compactor = SessionCompactor()
+        # Generates memories once per burst of turns, not after every turn
+        self.memory_scheduler = MemoryGenerationScheduler()
 
     async def init_remote_agent_addresses(self, remote_agent_addresses: list[str]):
         """Initializes the remote agent addresses.
@@ -154,13 +135,48 @@ class AdkOrchestratorAgent:
             agent_info.append(json.dumps(ra))
         self.agents = "\n".join(agent_info)
 
+    async def auto_save_session_to_memory_callback(
+        self, callback_context: CallbackContext
+    ):
+        """
+        Callback to save conversation session to Vertex AI Memory Bank.
+
+        This callback is triggered after the agent completes processing.
+        It hands the session to the memory generation scheduler, which
+        coalesces the turns of a session and sends the new events to the
+        Memory Bank service once the conversation goes idle or enough turns
+        are pending. The service generates semantic memories that can be
+        retrieved in future conversations.
+
+        Args:
+            callback_context: The callback context containing session and memory service.
+        """
+        session = callback_context._invocation_context.session
+        memory_service = callback_context._invocation_context.memory_service
+
+        logging.info(
+            f"Scheduling memory generation for session {session.id}, "
+            f"user_id={session.user_id}"
+        )
+        self.memory_scheduler.schedule(memory_service, session)
+
+        if isinstance(memory_service, PersistentVertexAiMemoryBankService):
+            # Record the watermark of generations finished since the last turn
+            watermark = memory_service.watermark(session)
+            if watermark != session.state.get(MEMORY_WATERMARK_STATE_KEY):
+                # Persisted with the after_agent_callback's state delta
+                callback_context.state[MEMORY_WATERMARK_STATE_KEY] = watermark
+
     def create_agent(self) -> Agent:
         """Creates the orchestrator agent."""
         return Agent(
             model="gemini-2.5-flash",
             name="orchestrator_agent",
             instruction=self.root_instruction,
-            before_model_callback=self.before_model_callback,
+            before_model_callback=[
+                self.before_model_callback,
+                self.session_compactor.before_model_callback,
+            ],
             description=(
                 "This agent orchestrates the decomposition of the user request into"
                 " tasks that can be performed by the child agents."
@@ -170,7 +186,7 @@ class AdkOrchestratorAgent:
                 self.send_message,
                 adk.tools.preload_memory_tool.PreloadMemoryTool(),
             ],
-            after_agent_callback=auto_save_session_to_memory_callback,
+            after_agent_callback=self.auto_save_session_to_memory_callback,
         )
 
     def root_instruction(self, context: ReadonlyContext) -> str:
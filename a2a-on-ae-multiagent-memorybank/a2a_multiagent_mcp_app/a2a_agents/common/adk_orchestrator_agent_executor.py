@@ -30,12 +30,18 @@ from dotenv import load_dotenv
 from google.adk import Runner
 from google.adk.artifacts import InMemoryArtifactService
 from google.adk.memory.in_memory_memory_service import InMemoryMemoryService
-from google.adk.sessions import InMemorySessionService, VertexAiSessionService
+from google.adk.sessions import VertexAiSessionService
+from google.adk.sessions.base_session_service import GetSessionConfig
 from google.genai import types
 
 from common.adk_orchestrator_agent import get_orchestrator_agent
 from common.auth_utils import GoogleAuth
 from common.adk_base_mcp_agent_executor import PersistentVertexAiMemoryBankService, _telemetry_enabled
+from common.context_locks import ContextLockRegistry
+from common.session_index import create_session_index
+from common.session_pool import SessionPool
+from common.sqlite_session_service import SqliteSessionService
+from common.windowed_session_service import WindowedVertexAiSessionService
 from vertexai.preview.reasoning_engines.templates.adk import (
     _default_instrumentor_builder,
 )
@@ -56,8 +62,11 @@ class AdkOrchestratorAgentExecutor(AgentExecutor, ABC):
     4. Error handling and recovery
     5. Agent engine configuration with custom memory topics
     """
-    # In-memory cache for mapping A2A context_id to ADK session objects.
-    CONTEXT_ID_TO_SESSION_MAP = {}
+    # Index mapping A2A context_id to ADK session IDs. Set
+    # SESSION_INDEX_REDIS_URL to share it across replicas.
+    SESSION_INDEX = create_session_index()
+    # One lock per context, so turns of a conversation never overlap.
+    CONTEXT_LOCKS = ContextLockRegistry()
 
     def __init__(
         self, remote_agent_addresses: list[str], agent_engine_id: str = None
@@ -72,6 +81,7 @@ class AdkOrchestratorAgentExecutor(AgentExecutor, ABC):
         self.remote_agent_addresses = remote_agent_addresses
         self.agent = None
         self.runner = None
+        self.session_pool = None
         self.agent_engine_id = agent_engine_id
 
         self.project_id = os.environ.get("PROJECT_ID")
@@ -126,15 +136,17 @@ class AdkOrchestratorAgentExecutor(AgentExecutor, ABC):
                     agent_engine_id=self.agent_engine_id,
                 )
 
-                my_session_service = VertexAiSessionService(
+                # Loads only the recent events of a session, incrementally
+                my_session_service = WindowedVertexAiSessionService(
                     project=os.environ.get("PROJECT_ID"),
                     location=os.environ.get("LOCATION"),
                     agent_engine_id=self.agent_engine_id,
                 )
             else:
-                # Use in-memory services for local testing
+                # Local mode: in-memory memory, sessions in a SQLite file that
+                # survives restarts and is shared by worker processes
                 my_memory_service = InMemoryMemoryService()
-                my_session_service = InMemorySessionService()
+                my_session_service = SqliteSessionService()
 
             # The Runner orchestrates the agent execution
             # It manages the LLM calls, tool execution, and state
@@ -145,6 +157,12 @@ class AdkOrchestratorAgentExecutor(AgentExecutor, ABC):
                 session_service=my_session_service,
                 memory_service=my_memory_service,
             )
+            if isinstance(my_session_service, VertexAiSessionService):
+                # Sessions created ahead of time, so new conversations skip
+                # the create_session round trip
+                self.session_pool = SessionPool(
+                    my_session_service, self.runner.app_name
+                )
 
     async def execute(
         self,
@@ -190,41 +208,49 @@ class AdkOrchestratorAgentExecutor(AgentExecutor, ABC):
         await updater.start_work()
 
         try:
-            # Get or create a session for this conversation
-            session = await self._get_or_create_session(context.context_id, user_id=user_id)
-            logging.info(f"Using session: {session.id} for user: {user_id}")
-            logging.debug(f"Session events for session {session.id}: {session.events}")
-
-            # Prepare the user message in ADK format
-            content = types.Content(role=Role.user, parts=[types.Part(text=query)])
-
-            # Run the agent asynchronously
-            # This may involve multiple LLM calls and tool uses
-            answer_sent = False
-            async for event in self.runner.run_async(
-                session_id=session.id,
-                user_id=user_id,  # Use the parsed user ID
-                new_message=content,
-            ):
-                # The agent may produce multiple events
-                # We're interested in the final response
-                if event.is_final_response() and not answer_sent:
-                    # Extract the answer text from the response
-                    answer = self._extract_answer(event, query)
-                    logging.info(f" {answer}")
-
-                    # Add the answer as an artifact
-                    # Artifacts are the "outputs" or "results" of a task
-                    # They're separate from status messages
-                    await updater.add_artifact(
-                        [TextPart(text=answer)],
-                        name="answer",  # Name helps clients identify artifacts
-                    )
+            # Serialize turns of this conversation; other contexts run in parallel
+            async with self.CONTEXT_LOCKS.lock(f"{self.runner.app_name}:{context.context_id}"):
+                # Get or create a session for this conversation
+                session_id = await self._get_or_create_session(context.context_id, user_id=user_id)
+                logging.info(f"Using session: {session_id} for user: {user_id}")
+
+                # Prepare the user message in ADK format
+                content = types.Content(role=Role.user, parts=[types.Part(text=query)])
+                # Retags a claimed pre-created session along with the message
+                state_delta = (
+                    self.session_pool.claimed_state_delta(session_id)
+                    if self.session_pool
+                    else None
+                )
 
-                    # Mark task as completed successfully
-                    await updater.complete()
-                    answer_sent = True
-                    # Don't break - continue consuming events to allow callbacks to execute
+                # Run the agent asynchronously
+                # This may involve multiple LLM calls and tool uses
+                answer_sent = False
+                async for event in self.runner.run_async(
+                    session_id=session_id,
+                    user_id=user_id,  # Use the parsed user ID
+                    new_message=content,
+                    state_delta=state_delta,
+                ):
+                    # The agent may produce multiple events
+                    # We're interested in the final response
+                    if event.is_final_response() and not answer_sent:
+                        # Extract the answer text from the response
+                        answer = self._extract_answer(event, query)
+                        logging.info(f" {answer}")
+
+                        # Add the answer as an artifact
+                        # Artifacts are the "outputs" or "results" of a task
+                        # They're separate from status messages
+                        await updater.add_artifact(
+                            [TextPart(text=answer)],
+                            name="answer",  # Name helps clients identify artifacts
+                        )
+
+                        # Mark task as completed successfully
+                        await updater.complete()
+                        answer_sent = True
+                        # Don't break - continue consuming events to allow callbacks to execute
 
         except Exception as e:
             # Errors should never pass silently (Zen of Python)
@@ -236,31 +262,56 @@ class AdkOrchestratorAgentExecutor(AgentExecutor, ABC):
             # Re-raise for proper error handling up the stack
             raise
 
-    async def _get_or_create_session(self, context_id: str, user_id: str):
-        """Get existing session from cache or create a new one."""
-        if context_id in self.CONTEXT_ID_TO_SESSION_MAP:
+    async def _get_or_create_session(self, context_id: str, user_id: str) -> str:
+        """Get the session ID for a context from the index, or create a session."""
+        index_key = f"{self.runner.app_name}:{context_id}"
+        session_id = await self.SESSION_INDEX.get(index_key)
+        if session_id is not None:
             logging.info(f"Found existing session for context {context_id}.")
-            return self.CONTEXT_ID_TO_SESSION_MAP[context_id]
+            return session_id
         
         logging.info(f"Creating new session for context {context_id}.")
         
-        if isinstance(self.runner.session_service, InMemorySessionService):
-            # For in-memory sessions, we can use the context_id directly
-            session = await self.runner.session_service.create_session(
+        if not isinstance(self.runner.session_service, VertexAiSessionService):
+            # For local sessions, we can use the context_id directly, so a
+            # restarted or another worker process resumes the same session
+            session = await self.runner.session_service.get_session(
                 app_name=self.runner.app_name,
                 user_id=user_id,
                 session_id=context_id,
+                config=GetSessionConfig(num_recent_events=1),
             )
+            if session is None:
+                try:
+                    session = await self.runner.session_service.create_session(
+                        app_name=self.runner.app_name,
+                        user_id=user_id,
+                        session_id=context_id,
+                    )
+                except ValueError:
+                    # Another worker created the session since the lookup
+                    session = await self.runner.session_service.get_session(
+                        app_name=self.runner.app_name,
+                        user_id=user_id,
+                        session_id=context_id,
+                        config=GetSessionConfig(num_recent_events=1),
+                    )
+                    if session is None:
+                        raise
+                    logging.info(f"Using session {context_id} created by another worker.")
+            session_id = await self.SESSION_INDEX.put(index_key, session.id)
         else:
-            # For Vertex AI Session Service, create a new session without passing session_id
-            # Let Vertex AI generate a valid session resource name
-            session = await self.runner.session_service.create_session(
-                app_name=self.runner.app_name,
-                user_id=user_id,
-            )
-        
-        self.CONTEXT_ID_TO_SESSION_MAP[context_id] = session
-        return session
+            # For Vertex AI Session Service, claim a session pre-created by
+            # Vertex AI, which generates a valid session resource name
+            claimed_id = await self.session_pool.claim(user_id)
+            session_id = await self.SESSION_INDEX.put(index_key, claimed_id)
+            if session_id != claimed_id:
+                # Another replica created a session for this context first
+                logging.info(f"Using session {session_id} indexed by another replica.")
+                self.session_pool.release(user_id, claimed_id)
+            logging.info(f"Session pool metrics: {self.session_pool.metrics()}")
+        logging.info(f"Session index metrics: {self.SESSION_INDEX.metrics()}")
+        return session_id
 
     def _extract_answer(self, event, query: str) -> str:
         """Extract text answer from agent response and remove the original query if present."""
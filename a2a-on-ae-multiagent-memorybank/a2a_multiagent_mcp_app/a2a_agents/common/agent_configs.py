@@ -16,6 +16,14 @@
 
 This module contains configuration dictionaries for different agent types.
 Each configuration defines the agent's name, description, instruction, and MCP settings.
+
+"tool_cache_ttl_seconds" sets how long the agent reuses an MCP tool's result
+for the same arguments. Tools without an entry are always called.
+
+"mcp_transport" selects how the agent reaches its tools: "http" calls the
+Cloud Run MCP server at the URL in mcp_url_env_var, "in_process" imports
+mcp_server_module from mcp_server_dir (relative to a2a_agents/) and calls the
+same FastMCP server in-process, for containers that ship the server code.
 """
 
 from typing import Dict
@@ -34,6 +42,19 @@ COCKTAIL_AGENT_CONFIG: Dict = {
     ),
     "model": "gemini-2.5-flash",
     "mcp_url_env_var": "CT_MCP_SERVER_URL",
+    "mcp_transport": "http",
+    "mcp_server_module": "cocktail_server",
+    "mcp_server_dir": "../../../mcp_servers/cocktail_mcp_server",
+    "tool_cache_ttl_seconds": {
+        # Recipes only change when TheCocktailDB is edited
+        "lookup_cocktail_details_by_id": 24 * 60 * 60,
+        "lookup_cocktails_by_ids": 24 * 60 * 60,
+        "search_ingredient_by_name": 24 * 60 * 60,
+        "find_similar_cocktails": 24 * 60 * 60,
+        "search_cocktail_by_name": 6 * 60 * 60,
+        "list_cocktails_by_first_letter": 6 * 60 * 60,
+        # list_random_cocktails is deliberately not cached
+    },
 }
 
 
@@ -50,4 +71,14 @@ WEATHER_AGENT_CONFIG: Dict = {
     ),
     "model": "gemini-2.5-flash",
     "mcp_url_env_var": "WEA_MCP_SERVER_URL",
+    "mcp_transport": "http",
+    "mcp_server_module": "weather_server",
+    "mcp_server_dir": "../../../mcp_servers/weather_mcp_server",
+    "tool_cache_ttl_seconds": {
+        # Alerts can be issued at any time, keep them fresh
+        "get_alerts": 60,
+        # NWS forecasts are updated roughly hourly
+        "get_forecast": 10 * 60,
+        "get_forecast_by_city": 10 * 60,
+    },
 }
@@ -14,7 +14,7 @@
 """Shared authentication utilities for Google Cloud services."""
 
 import logging
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
 import httpx
 from google.auth import default
@@ -77,3 +77,38 @@ class GoogleAuth(httpx.Auth):
         # Add the Authorization header to the request
         request.headers["Authorization"] = f"Bearer {self.credentials.token}"
         yield request
+
+
+class OidcTokenAuth(httpx.Auth):
+    """An httpx Auth hook that adds a TokenManager's OIDC token per request.
+
+    Each request reads the current token when it is sent, so connections that
+    outlive a token (such as pooled MCP sessions) and concurrent executions
+    never share or swap mutable headers. A 401 response triggers one refresh
+    and retry of the request.
+
+    Example:
+        >>> auth = OidcTokenAuth(TokenManager(audience=mcp_url))
+        >>> client = httpx.AsyncClient(auth=auth)
+    """
+
+    def __init__(self, token_manager) -> None:
+        """Initializes the hook.
+
+        Args:
+            token_manager: Object with async get_headers() and refresh(),
+                e.g. the TokenManager of adk_base_mcp_agent_executor.
+        """
+        self.token_manager = token_manager
+
+    async def async_auth_flow(
+        self, request: httpx.Request
+    ) -> AsyncGenerator[httpx.Request, httpx.Response]:
+        """Adds the Authorization header, refreshing once on a 401."""
+        request.headers.update(await self.token_manager.get_headers())
+        response = yield request
+        if response.status_code == 401:
+            logger.info("MCP request unauthorized, refreshing OIDC token...")
+            await self.token_manager.refresh()
+            request.headers.update(await self.token_manager.get_headers())
+            yield request
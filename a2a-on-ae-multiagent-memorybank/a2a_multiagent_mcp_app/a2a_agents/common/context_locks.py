@@ -0,0 +1,83 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Per-context asyncio locks for the executors.
+
+Two overlapping messages on one A2A context would otherwise run
+runner.run_async concurrently on the same session, interleaving their events.
+The registry hands out one lock per context, so turns of a conversation run
+one after the other while different contexts share nothing and run in
+parallel. A lock exists only while a turn holds or waits for it, so the
+registry never grows with the number of past conversations.
+
+The locks are per process; across replicas, the session index resolves
+concurrent first turns to a single session.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class _ContextLock:
+    """A lock and the number of turns holding or waiting for it."""
+
+    __slots__ = ("lock", "users")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class ContextLockRegistry:
+    """Hands out one asyncio.Lock per key, dropping it once unused."""
+
+    def __init__(self):
+        self._locks: Dict[str, _ContextLock] = {}
+        self.stats: Dict[str, int] = {"acquired": 0, "contended": 0}
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    @asynccontextmanager
+    async def lock(self, key: str) -> AsyncIterator[None]:
+        """
+        Hold the lock of a key for the duration of the context.
+
+        Args:
+            key: Identifies the conversation, e.g. app name and context ID.
+        """
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = _ContextLock()
+        entry.users += 1
+        contended = entry.lock.locked()
+        wait_start_time = time.time()
+        try:
+            async with entry.lock:
+                if contended:
+                    self.stats["contended"] += 1
+                    logger.info(
+                        f"Waited {time.time() - wait_start_time:.2f} seconds "
+                        f"for the previous turn of {key}"
+                    )
+                self.stats["acquired"] += 1
+                yield
+        finally:
+            entry.users -= 1
+            if entry.users == 0 and self._locks.get(key) is entry:
+                del self._locks[key]
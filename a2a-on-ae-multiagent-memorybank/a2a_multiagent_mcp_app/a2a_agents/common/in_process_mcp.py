@@ -0,0 +1,101 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""In-process MCP transport for specialist agents colocated with their tools.
+
+Instead of calling the weather or cocktail MCP server over streamable HTTP,
+the agent imports the server module and talks to its FastMCP object over
+in-memory streams. Tool schemas and results are exactly those of the deployed
+server, without OIDC tokens, HTTP or a Cloud Run hop.
+
+Select it with "mcp_transport": "in_process" in agent_configs.py.
+"""
+
+import importlib
+import logging
+import os
+import sys
+from contextlib import asynccontextmanager
+from typing import Any, Optional
+
+import anyio
+from mcp.shared.memory import create_client_server_memory_streams
+from pydantic import BaseModel, ConfigDict
+
+logger = logging.getLogger(__name__)
+
+# Relative mcp_server_dir values in agent_configs.py resolve against a2a_agents/
+AGENTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class InProcessConnectionParams(BaseModel):
+    """Connection parameters for an MCP server running in this process.
+
+    Attributes:
+        server: The FastMCP (or low-level MCP Server) object to connect to.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    server: Any
+
+
+def load_fastmcp_server(
+    module_name: str, server_dir: Optional[str] = None, attribute: str = "mcp"
+) -> Any:
+    """
+    Import an MCP server module and return its FastMCP object.
+
+    Args:
+        module_name: Module defining the server, e.g. "cocktail_server".
+        server_dir: Directory containing the module, absolute or relative to
+                    a2a_agents/. Added to sys.path so the module's own sibling
+                    imports (e.g. drink_catalog) resolve.
+        attribute: Name of the FastMCP object in the module.
+
+    Returns:
+        The server object.
+    """
+    if server_dir:
+        path = os.path.abspath(os.path.join(AGENTS_DIR, server_dir))
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    module = importlib.import_module(module_name)
+    logger.info(f"Loaded in-process MCP server {module_name}.{attribute}")
+    return getattr(module, attribute)
+
+
+@asynccontextmanager
+async def in_process_client(server: Any):
+    """
+    Run an MCP server on in-memory streams for the lifetime of the context.
+
+    Yields the client's (read_stream, write_stream), like the HTTP transports,
+    so it can back an MCP ClientSession.
+    """
+    lowlevel_server = getattr(server, "_mcp_server", server)
+    async with create_client_server_memory_streams() as (
+        client_streams,
+        server_streams,
+    ):
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(
+                lambda: lowlevel_server.run(
+                    *server_streams,
+                    lowlevel_server.create_initialization_options(),
+                )
+            )
+            try:
+                yield client_streams
+            finally:
+                tg.cancel_scope.cancel()
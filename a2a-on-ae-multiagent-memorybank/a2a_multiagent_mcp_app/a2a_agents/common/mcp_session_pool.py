@@ -0,0 +1,506 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Long-lived, health-checked MCP client sessions for ADK toolsets.
+
+ADK's MCPSessionManager keys sessions by a hash of the request headers, so
+every refreshed OIDC token opens a new MCP session (initialize handshake, TLS
+and list_tools) and leaks the old one. The pooled manager below keeps one
+session per toolset open across agent turns instead:
+
+1. Each session is owned by a background task, which opens the transport,
+   runs the initialize handshake and later closes it from the same task, as
+   anyio requires.
+2. The owner task pings the server whenever the session has been idle for
+   the keepalive interval, and a session that has been idle for longer is
+   pinged again before it is handed out.
+3. Sessions that fail a ping, are closed by the transport, or are forgotten
+   by the server (e.g. a recycled Cloud Run instance) are replaced
+   transparently, and the failed tool call is retried once.
+4. Credentials that rotate are best supplied through an httpx auth hook,
+   which stamps every request without touching the session. When the static
+   headers change instead, the old session is retired after a grace period
+   so in-flight tool calls can finish.
+"""
+
+import asyncio
+import logging
+import sys
+import time
+from contextlib import AsyncExitStack
+from datetime import timedelta
+from typing import Awaitable, Dict, List, Optional, TextIO, TypeVar
+
+import anyio
+import httpx
+
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.mcp_tool.mcp_session_manager import (
+    MCPSessionManager,
+    SseConnectionParams,
+    StdioConnectionParams,
+    StreamableHTTPConnectionParams,
+    retry_on_closed_resource,
+)
+from google.adk.tools.mcp_tool.mcp_tool import MCPTool
+from google.adk.tools.mcp_tool.mcp_toolset import McpToolset
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from mcp.client.streamable_http import streamablehttp_client
+from mcp.shared.exceptions import McpError
+from mcp.types import Tool
+
+from common.in_process_mcp import InProcessConnectionParams, in_process_client
+from common.tool_schema_cache import (
+    TOOL_SCHEMA_CACHE,
+    ToolSchemaCache,
+    server_version,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Seconds a session may sit idle before the owner task pings it
+DEFAULT_KEEPALIVE_INTERVAL_SECONDS = 60.0
+# Seconds to wait for a ping (and for the initialize handshake)
+DEFAULT_PING_TIMEOUT_SECONDS = 5.0
+# Seconds a retired session stays open so in-flight tool calls can finish
+DEFAULT_RETIRE_GRACE_SECONDS = 30.0
+
+
+def _is_session_lost(error: Exception) -> bool:
+    """Returns True if the server no longer knows the client's MCP session."""
+    # The streamable HTTP client reports a 404 for our session ID this way
+    return isinstance(error, McpError) and "Session terminated" in str(error)
+
+
+class _PooledSession:
+    """A session, the task that owns its transport, and its bookkeeping."""
+
+    def __init__(self, session_key: str):
+        self.session_key = session_key
+        self.session: Optional[ClientSession] = None
+        self.server_version: Optional[str] = None
+        self.loop = asyncio.get_running_loop()
+        self.ready = asyncio.Event()
+        self.stop = asyncio.Event()
+        self.done = asyncio.Event()
+        self.closed = False
+        self.error: Optional[BaseException] = None
+        self.last_used = time.monotonic()
+        self.task: Optional[asyncio.Task] = None
+        self.retire_task: Optional[asyncio.Task] = None
+
+
+class PooledMcpSessionManager(MCPSessionManager):
+    """MCPSessionManager that keeps one health-checked session alive.
+
+    Drop-in replacement for the session manager created by McpToolset; use it
+    through PooledMcpToolset.
+    """
+
+    def __init__(
+        self,
+        connection_params,
+        errlog: TextIO = sys.stderr,
+        keepalive_interval_seconds: float = DEFAULT_KEEPALIVE_INTERVAL_SECONDS,
+        ping_timeout_seconds: float = DEFAULT_PING_TIMEOUT_SECONDS,
+        retire_grace_seconds: float = DEFAULT_RETIRE_GRACE_SECONDS,
+        auth: Optional[httpx.Auth] = None,
+    ):
+        """
+        Initialize the pooled session manager.
+
+        Args:
+            connection_params: MCP connection parameters, as for McpToolset.
+            errlog: Stream for stdio server error output.
+            keepalive_interval_seconds: Idle time after which the session is
+                                        pinged to keep it (and the server's
+                                        session state) alive.
+            ping_timeout_seconds: Timeout for pings and the initialize handshake.
+            retire_grace_seconds: How long a replaced session stays open for
+                                  tool calls that are still running on it.
+            auth: httpx auth hook applied to every HTTP request of the session,
+                  e.g. to add a fresh bearer token without reopening it.
+        """
+        super().__init__(connection_params=connection_params, errlog=errlog)
+        self._auth = auth
+        self.keepalive_interval_seconds = keepalive_interval_seconds
+        self.ping_timeout_seconds = ping_timeout_seconds
+        self.retire_grace_seconds = retire_grace_seconds
+        self._pooled: Optional[_PooledSession] = None
+        # Open sessions, including retired ones, by id(session)
+        self._owners: Dict[int, _PooledSession] = {}
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats: Dict[str, int] = {
+            "sessions_opened": 0,
+            "sessions_reused": 0,
+            "keepalive_pings": 0,
+            "health_check_failures": 0,
+        }
+
+    async def create_session(
+        self, headers: Optional[Dict[str, str]] = None
+    ) -> ClientSession:
+        """
+        Return the pooled session, opening or replacing it when needed.
+
+        Args:
+            headers: Optional headers merged with the connection headers.
+
+        Returns:
+            An initialized ClientSession.
+        """
+        merged_headers = self._merge_headers(headers)
+        session_key = self._generate_session_key(merged_headers)
+
+        loop = asyncio.get_running_loop()
+        if self._lock_loop is not loop:
+            # asyncio locks and the session's streams are bound to one loop
+            self._session_lock = asyncio.Lock()
+            self._lock_loop = loop
+
+        async with self._session_lock:
+            pooled = self._pooled
+            if pooled is not None and await self._is_reusable(pooled, session_key):
+                pooled.last_used = time.monotonic()
+                self.stats["sessions_reused"] += 1
+                return pooled.session
+
+            if pooled is not None:
+                self._retire(pooled)
+            self._pooled = None
+            pooled = await self._open(merged_headers, session_key)
+            self._pooled = pooled
+            return pooled.session
+
+    @property
+    def server_version(self) -> Optional[str]:
+        """Version reported by the server of the open session, if any."""
+        pooled = self._pooled
+        if pooled is None or pooled.closed:
+            return None
+        return pooled.server_version
+
+    async def invalidate_session(self, session: ClientSession) -> None:
+        """
+        Drop a session the caller found to be broken.
+
+        Args:
+            session: The session returned by a previous create_session call.
+        """
+        async with self._session_lock:
+            pooled = self._pooled
+            if pooled is not None and pooled.session is session:
+                logger.info(f"Invalidating MCP session {pooled.session_key}")
+                self._retire(pooled, grace_seconds=0)
+                self._pooled = None
+
+    async def run_on_session(self, session: ClientSession, request: Awaitable[T]) -> T:
+        """
+        Await a request on a pooled session, failing fast if its transport dies.
+
+        When the connection drops, the MCP client tears down the transport
+        without answering pending requests, which would then wait forever. The
+        request is raced against the session's owner task instead, and fails
+        with ClosedResourceError so retry_on_closed_resource retries it once on
+        a fresh session.
+
+        Args:
+            session: The session returned by create_session.
+            request: The request coroutine, e.g. session.call_tool(...).
+
+        Returns:
+            The request's result.
+        """
+        pooled = self._owners.get(id(session))
+        if pooled is None:
+            return await request
+        request_task = asyncio.ensure_future(request)
+        closed_task = asyncio.ensure_future(pooled.done.wait())
+        try:
+            await asyncio.wait(
+                {request_task, closed_task}, return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            closed_task.cancel()
+            if not request_task.done():
+                request_task.cancel()
+        if not request_task.done() or request_task.cancelled():
+            raise anyio.ClosedResourceError()
+        return request_task.result()
+
+    async def close(self):
+        """Closes the pooled session and waits for its owner task to exit."""
+        pooled, self._pooled = self._pooled, None
+        if pooled is None or pooled.loop is not asyncio.get_running_loop():
+            return
+        self._retire(pooled, grace_seconds=0)
+        if pooled.task is not None:
+            await asyncio.gather(pooled.task, return_exceptions=True)
+
+    async def _is_reusable(self, pooled: _PooledSession, session_key: str) -> bool:
+        """Checks ownership, headers and liveness of the pooled session."""
+        if pooled.closed or pooled.session_key != session_key:
+            return False
+        if pooled.loop is not asyncio.get_running_loop():
+            return False
+        if self._is_session_disconnected(pooled.session):
+            return False
+        if time.monotonic() - pooled.last_used < self.keepalive_interval_seconds:
+            return True
+        # Idle past a keepalive interval: the server may have dropped it
+        # between pings, so check before handing it out
+        if await self._ping(pooled):
+            return True
+        self.stats["health_check_failures"] += 1
+        return False
+
+    def _create_client(self, merged_headers: Optional[Dict[str, str]] = None):
+        """Creates the MCP client, passing the auth hook to HTTP transports."""
+        params = self._connection_params
+        if isinstance(params, InProcessConnectionParams):
+            return in_process_client(params.server)
+        if self._auth is None:
+            return super()._create_client(merged_headers)
+        if isinstance(params, StreamableHTTPConnectionParams):
+            return streamablehttp_client(
+                url=params.url,
+                headers=merged_headers,
+                timeout=timedelta(seconds=params.timeout),
+                sse_read_timeout=timedelta(seconds=params.sse_read_timeout),
+                terminate_on_close=params.terminate_on_close,
+                auth=self._auth,
+            )
+        if isinstance(params, SseConnectionParams):
+            return sse_client(
+                url=params.url,
+                headers=merged_headers,
+                timeout=params.timeout,
+                sse_read_timeout=params.sse_read_timeout,
+                auth=self._auth,
+            )
+        return super()._create_client(merged_headers)
+
+    async def _open(
+        self, merged_headers: Optional[Dict[str, str]], session_key: str
+    ) -> _PooledSession:
+        """Starts an owner task for a new session and waits until it is ready."""
+        pooled = _PooledSession(session_key)
+        pooled.task = asyncio.create_task(self._own_session(pooled, merged_headers))
+        await pooled.ready.wait()
+        if pooled.session is None:
+            raise pooled.error or ConnectionError("MCP session closed during setup")
+        self._owners[id(pooled.session)] = pooled
+        self.stats["sessions_opened"] += 1
+        logger.info(f"Opened pooled MCP session {session_key}")
+        return pooled
+
+    async def _own_session(
+        self, pooled: _PooledSession, merged_headers: Optional[Dict[str, str]]
+    ) -> None:
+        """Opens, keeps alive and finally closes one session, all in this task."""
+        try:
+            async with AsyncExitStack() as exit_stack:
+                transports = await exit_stack.enter_async_context(
+                    self._create_client(merged_headers)
+                )
+                read_timeout = None
+                if isinstance(self._connection_params, StdioConnectionParams):
+                    read_timeout = timedelta(seconds=self._connection_params.timeout)
+                session = await exit_stack.enter_async_context(
+                    ClientSession(*transports[:2], read_timeout_seconds=read_timeout)
+                )
+                result = await asyncio.wait_for(
+                    session.initialize(), timeout=self.ping_timeout_seconds
+                )
+                pooled.server_version = server_version(result)
+                pooled.session = session
+                pooled.last_used = time.monotonic()
+                pooled.ready.set()
+                await self._keep_alive(pooled)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            pooled.error = e
+            if pooled.session is None:
+                logger.warning(f"Failed to open MCP session {pooled.session_key}: {e}")
+            else:
+                logger.info(f"MCP session {pooled.session_key} closed: {e}")
+        finally:
+            pooled.closed = True
+            pooled.ready.set()
+            pooled.done.set()
+            self._owners.pop(id(pooled.session), None)
+
+    async def _keep_alive(self, pooled: _PooledSession) -> None:
+        """Pings the session when idle until it is retired or stops answering."""
+        while not pooled.stop.is_set():
+            idle = time.monotonic() - pooled.last_used
+            wait = max(self.keepalive_interval_seconds - idle, 0.1)
+            try:
+                await asyncio.wait_for(pooled.stop.wait(), timeout=wait)
+                return
+            except asyncio.TimeoutError:
+                pass
+            if time.monotonic() - pooled.last_used < self.keepalive_interval_seconds:
+                continue
+            self.stats["keepalive_pings"] += 1
+            if not await self._ping(pooled):
+                logger.info(f"MCP session {pooled.session_key} failed keepalive")
+                return
+
+    async def _ping(self, pooled: _PooledSession) -> bool:
+        """Sends an MCP ping, returning whether the server answered in time."""
+        try:
+            await asyncio.wait_for(
+                pooled.session.send_ping(), timeout=self.ping_timeout_seconds
+            )
+        except Exception as e:
+            logger.info(f"Ping failed for MCP session {pooled.session_key}: {e}")
+            return False
+        pooled.last_used = time.monotonic()
+        return True
+
+    def _retire(
+        self, pooled: _PooledSession, grace_seconds: Optional[float] = None
+    ) -> None:
+        """Asks the owner task to close a session after an optional grace period."""
+        if pooled.closed or pooled.loop is not asyncio.get_running_loop():
+            # Already gone, or owned by a loop that is no longer running
+            return
+        grace = self.retire_grace_seconds if grace_seconds is None else grace_seconds
+
+        async def stop_later() -> None:
+            await asyncio.sleep(grace)
+            pooled.stop.set()
+
+        if grace > 0:
+            pooled.retire_task = asyncio.create_task(stop_later())
+        else:
+            pooled.stop.set()
+
+
+class PooledMcpTool(MCPTool):
+    """MCPTool that reconnects once when the server has lost its session."""
+
+    @retry_on_closed_resource
+    async def _run_async_impl(self, *, args, tool_context, credential):
+        headers = await self._get_headers(tool_context, credential)
+        session = await self._mcp_session_manager.create_session(headers=headers)
+        manager = self._mcp_session_manager
+        try:
+            return await manager.run_on_session(
+                session, session.call_tool(self.name, arguments=args)
+            )
+        except McpError as e:
+            if not _is_session_lost(e):
+                raise
+            logger.info(f"MCP session lost during {self.name}, reconnecting")
+            await manager.invalidate_session(session)
+            session = await manager.create_session(headers=headers)
+            return await manager.run_on_session(
+                session, session.call_tool(self.name, arguments=args)
+            )
+
+
+class PooledMcpToolset(McpToolset):
+    """McpToolset backed by a PooledMcpSessionManager and a tool schema cache.
+
+    Tools are listed from the server only when the schema cache has no entry
+    for the URL, or when the open session reports a different server version
+    than the cached one.
+
+    Example:
+        >>> toolset = PooledMcpToolset(
+        ...     connection_params=StreamableHTTPConnectionParams(url=mcp_url),
+        ...     auth=OidcTokenAuth(TokenManager(audience=mcp_url)),
+        ... )
+    """
+
+    def __init__(
+        self,
+        *,
+        connection_params,
+        keepalive_interval_seconds: float = DEFAULT_KEEPALIVE_INTERVAL_SECONDS,
+        ping_timeout_seconds: float = DEFAULT_PING_TIMEOUT_SECONDS,
+        retire_grace_seconds: float = DEFAULT_RETIRE_GRACE_SECONDS,
+        tool_schema_cache: ToolSchemaCache = TOOL_SCHEMA_CACHE,
+        auth: Optional[httpx.Auth] = None,
+        **kwargs,
+    ):
+        super().__init__(connection_params=connection_params, **kwargs)
+        self._tool_schema_cache = tool_schema_cache
+        self._mcp_session_manager = PooledMcpSessionManager(
+            connection_params=self._connection_params,
+            errlog=self._errlog,
+            keepalive_interval_seconds=keepalive_interval_seconds,
+            ping_timeout_seconds=ping_timeout_seconds,
+            retire_grace_seconds=retire_grace_seconds,
+            auth=auth,
+        )
+
+    def invalidate_tool_schemas(self) -> None:
+        """Forces the next get_tools call to list tools from the server."""
+        self._tool_schema_cache.invalidate(self._cache_url)
+
+    @property
+    def _cache_url(self) -> Optional[str]:
+        # Stdio servers have no URL and are never cached
+        return getattr(self._connection_params, "url", None)
+
+    async def get_tools(
+        self, readonly_context: Optional[ReadonlyContext] = None
+    ) -> List[BaseTool]:
+        """Returns tools from the schema cache, listing them only when stale."""
+        url = self._cache_url
+        cached = self._tool_schema_cache.get(url) if url else None
+        live_version = self._mcp_session_manager.server_version
+        if cached is not None and live_version in (None, cached["version"]):
+            # With no open session yet, trust the cache; the first tool call
+            # opens one and a changed version is picked up on the next turn
+            mcp_tools = cached["tools"]
+        else:
+            mcp_tools = await self._list_tools()
+            if url:
+                self._tool_schema_cache.put(
+                    url, self._mcp_session_manager.server_version, mcp_tools
+                )
+
+        tools = []
+        for tool in mcp_tools:
+            mcp_tool = PooledMcpTool(
+                mcp_tool=tool,
+                mcp_session_manager=self._mcp_session_manager,
+                auth_scheme=self._auth_scheme,
+                auth_credential=self._auth_credential,
+            )
+            if self._is_tool_selected(mcp_tool, readonly_context):
+                tools.append(mcp_tool)
+        return tools
+
+    @retry_on_closed_resource
+    async def _list_tools(self) -> List[Tool]:
+        """Lists tools over the pooled session, reconnecting once if it was lost."""
+        manager = self._mcp_session_manager
+        session = await manager.create_session()
+        try:
+            return (await manager.run_on_session(session, session.list_tools())).tools
+        except McpError as e:
+            if not _is_session_lost(e):
+                raise
+            await manager.invalidate_session(session)
+            session = await manager.create_session()
+            return (await manager.run_on_session(session, session.list_tools())).tools
@@ -0,0 +1,367 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Debounced memory generation, coalescing the turns of a session.
+
+The agents' after_agent_callbacks used to call add_session_to_memory after
+every turn, starting one Memory Bank generate operation per turn. The
+scheduler instead records that a session has new turns and generates once:
+
+1. idle_seconds after the session's last turn, which is also how the end of
+   a conversation shows up, since A2A has no explicit end-of-context signal;
+2. as soon as max_turns turns are pending, so long conversations are still
+   remembered while they run;
+3. when the server is asked to stop (SIGTERM or SIGINT), for every session
+   still pending. The flush runs on the server's running loop, bounded by
+   shutdown_timeout_seconds, before the server's own signal handler runs.
+   A2aAgent exposes no lifespan hook, so the scheduler installs this handler
+   itself on its first turn; that requires the loop's thread to be the main
+   thread, as it is under uvicorn.
+
+Due sessions go through a bounded queue served by a few worker tasks, so
+generation never runs in a request's task. A session already queued is not
+queued again; its newest snapshot is used when a worker picks it up. A
+session is never generated twice at once: turns that become due while its
+generation runs are queued once it ends, since both generations would read
+the same watermark and submit the same events. When
+the queue is full the session stays pending and is retried after another
+idle period. Failed generations are retried with exponential backoff.
+
+Each generation submits the latest session snapshot, and the memory service
+only sends the events after its watermark, so coalesced turns are all
+covered by one operation.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import signal
+import time
+import weakref
+from typing import Any, Dict, List, Optional, Set
+
+from google.adk.sessions import Session
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IDLE_SECONDS = float(os.getenv("MEMORY_FLUSH_IDLE_SECONDS", "120"))
+DEFAULT_MAX_TURNS = int(os.getenv("MEMORY_FLUSH_MAX_TURNS", "10"))
+DEFAULT_QUEUE_SIZE = int(os.getenv("MEMORY_QUEUE_SIZE", "256"))
+DEFAULT_WORKERS = int(os.getenv("MEMORY_WORKERS", "4"))
+DEFAULT_MAX_ATTEMPTS = int(os.getenv("MEMORY_GENERATION_MAX_ATTEMPTS", "3"))
+DEFAULT_RETRY_BASE_SECONDS = float(os.getenv("MEMORY_RETRY_BASE_SECONDS", "1"))
+SHUTDOWN_TIMEOUT_SECONDS = float(os.getenv("MEMORY_SHUTDOWN_FLUSH_TIMEOUT_SECONDS", "8"))
+
+# Schedulers flushed when the server shuts down
+_SCHEDULERS: "weakref.WeakSet[MemoryGenerationScheduler]" = weakref.WeakSet()
+# Loop the shutdown signal handlers flush on, once installed
+_shutdown_loop: Optional[asyncio.AbstractEventLoop] = None
+_shutdown_task: Optional[asyncio.Task] = None
+# Handlers that were installed before _on_shutdown_signal, by signal number
+_PREVIOUS_HANDLERS: Dict[int, Any] = {}
+
+
+class _PendingGeneration:
+    """Newest snapshot of a session and the turns since its last generation."""
+
+    __slots__ = ("memory_service", "session", "turns", "first_turn_time")
+
+    def __init__(self, memory_service: Any, session: Session):
+        self.memory_service = memory_service
+        self.session = session
+        self.turns = 0
+        self.first_turn_time = time.time()
+
+
+class MemoryGenerationScheduler:
+    """Generates memories per session after an idle period or max_turns turns."""
+
+    def __init__(
+        self,
+        idle_seconds: float = DEFAULT_IDLE_SECONDS,
+        max_turns: int = DEFAULT_MAX_TURNS,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        workers: int = DEFAULT_WORKERS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        retry_base_seconds: float = DEFAULT_RETRY_BASE_SECONDS,
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            idle_seconds: Seconds without a new turn before a session's
+                          memories are generated.
+            max_turns: Pending turns that trigger a generation right away.
+            queue_size: Sessions waiting for a worker, beyond which due
+                        sessions are deferred.
+            workers: Worker tasks running generations concurrently.
+            max_attempts: Attempts per generation, including the first.
+            retry_base_seconds: Delay before the first retry, doubled for
+                                each further one.
+        """
+        self.idle_seconds = idle_seconds
+        self.max_turns = max_turns
+        self.queue_size = queue_size
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self._pending: Dict[str, _PendingGeneration] = {}
+        self._timers: Dict[str, asyncio.Task] = {}
+        # The queue and its workers belong to the loop that created them
+        self._queue: Optional["asyncio.Queue[str]"] = None
+        self._queued: Set[str] = set()
+        # Sessions with a generation in flight -> set when it ends
+        self._running: Dict[str, asyncio.Event] = {}
+        self._workers: List[asyncio.Task] = []
+        self.stats: Dict[str, int] = {
+            "turns": 0,
+            "enqueued": 0,
+            "coalesced": 0,
+            "deferred": 0,
+            "retries": 0,
+            "generations": 0,
+            "errors": 0,
+        }
+        _SCHEDULERS.add(self)
+
+    def schedule(self, memory_service: Any, session: Session) -> None:
+        """
+        Record a finished turn of a session.
+
+        Args:
+            memory_service: The Runner's memory service.
+            session: The session, including the turn's events.
+        """
+        entry = self._pending.get(session.id)
+        if entry is None:
+            entry = self._pending[session.id] = _PendingGeneration(
+                memory_service, session
+            )
+        entry.memory_service = memory_service
+        entry.session = session
+        entry.turns += 1
+        self.stats["turns"] += 1
+        _install_shutdown_flush(asyncio.get_running_loop())
+
+        if entry.turns >= self.max_turns:
+            self._enqueue(session.id)
+        else:
+            self._arm_timer(session.id)
+
+    async def flush(self, session_id: str) -> None:
+        """Generate memories for the pending turns of a session, if any."""
+        self._cancel_timer(session_id)
+        while session_id in self._running:
+            await self._running[session_id].wait()
+        entry = self._pending.pop(session_id, None)
+        if entry is not None:
+            await self._generate(session_id, entry)
+
+    async def flush_all(self) -> None:
+        """Generate memories for every pending session and wait for the workers."""
+        await asyncio.gather(*(self.flush(session_id) for session_id in list(self._pending)))
+        if self._workers and self._workers[0].get_loop() is asyncio.get_running_loop():
+            # Generations the workers already started
+            await self._queue.join()
+
+    def metrics(self) -> Dict[str, int]:
+        """Pending sessions, queue length and generation counters."""
+        return {
+            "pending": len(self._pending),
+            "queued": len(self._queued),
+            **self.stats,
+        }
+
+    def _enqueue(self, session_id: str) -> None:
+        """Queue a due session for the workers."""
+        self._cancel_timer(session_id)
+        if session_id in self._queued or session_id in self._running:
+            # The worker picks up the newest snapshot, or the session is
+            # queued again when its running generation ends
+            self.stats["coalesced"] += 1
+            return
+        queue = self._ensure_workers()
+        try:
+            queue.put_nowait(session_id)
+        except asyncio.QueueFull:
+            # Its turns stay pending and are retried after another idle period
+            self.stats["deferred"] += 1
+            logger.warning(
+                f"Memory generation queue is full; deferring session {session_id}"
+            )
+            self._arm_timer(session_id)
+            return
+        self._queued.add(session_id)
+        self.stats["enqueued"] += 1
+
+    def _ensure_workers(self) -> "asyncio.Queue[str]":
+        loop = asyncio.get_running_loop()
+        if self._queue is None or not self._workers or self._workers[0].get_loop() is not loop:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._queued.clear()
+            self._workers = [
+                loop.create_task(self._work(self._queue)) for _ in range(self.workers)
+            ]
+        return self._queue
+
+    async def _work(self, queue: "asyncio.Queue[str]") -> None:
+        """Worker task: generate memories for queued sessions, one at a time."""
+        while True:
+            session_id = await queue.get()
+            try:
+                if queue is self._queue:
+                    self._queued.discard(session_id)
+                if session_id in self._running:
+                    # A flush is generating it; it is queued again afterwards
+                    continue
+                # The snapshot below also covers turns waiting for a timer
+                self._cancel_timer(session_id)
+                entry = self._pending.pop(session_id, None)
+                if entry is not None:
+                    await self._generate(session_id, entry)
+            except Exception as e:
+                logger.error(f"Memory worker failed for session {session_id}: {e}")
+            finally:
+                queue.task_done()
+
+    async def _generate(self, session_id: str, entry: _PendingGeneration) -> None:
+        """Generate memories for a session, retrying failures with backoff."""
+        done = self._running[session_id] = asyncio.Event()
+        try:
+            await self._generate_with_retries(session_id, entry)
+        finally:
+            del self._running[session_id]
+            done.set()
+            pending = self._pending.get(session_id)
+            # Turns that became due meanwhile; others still wait for a timer
+            if pending is not None and (
+                pending.turns >= self.max_turns or session_id not in self._timers
+            ):
+                self._enqueue(session_id)
+
+    async def _generate_with_retries(
+        self, session_id: str, entry: _PendingGeneration
+    ) -> None:
+        generation_start_time = time.time()
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                await entry.memory_service.add_session_to_memory(entry.session)
+                break
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    self.stats["errors"] += 1
+                    logger.error(
+                        f"Memory generation failed for session {session_id} "
+                        f"after {attempt} attempts: {e}",
+                        exc_info=True,
+                    )
+                    return
+                delay = self.retry_base_seconds * 2 ** (attempt - 1)
+                delay *= random.uniform(0.5, 1.5)
+                self.stats["retries"] += 1
+                logger.warning(
+                    f"Memory generation failed for session {session_id}, "
+                    f"retrying in {delay:.1f} seconds: {e}"
+                )
+                await asyncio.sleep(delay)
+        self.stats["generations"] += 1
+        logger.info(
+            f"Generated memories for {entry.turns} turns of session {session_id} "
+            f"over {generation_start_time - entry.first_turn_time:.0f} seconds in "
+            f"{time.time() - generation_start_time:.2f} seconds; "
+            f"memory scheduler metrics: {self.metrics()}"
+        )
+
+    def _arm_timer(self, session_id: str) -> None:
+        self._cancel_timer(session_id)
+        self._timers[session_id] = asyncio.get_running_loop().create_task(
+            self._enqueue_when_idle(session_id)
+        )
+
+    async def _enqueue_when_idle(self, session_id: str) -> None:
+        await asyncio.sleep(self.idle_seconds)
+        if self._timers.get(session_id) is asyncio.current_task():
+            del self._timers[session_id]
+        self._enqueue(session_id)
+
+    def _cancel_timer(self, session_id: str) -> None:
+        timer = self._timers.pop(session_id, None)
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+
+
+def _install_shutdown_flush(loop: asyncio.AbstractEventLoop) -> None:
+    """Flush all schedulers on SIGTERM/SIGINT, then run the previous handlers."""
+    global _shutdown_loop
+    if _shutdown_loop is loop:
+        return
+    _shutdown_loop = loop
+    try:
+        previous = {
+            signum: signal.signal(signum, _on_shutdown_signal)
+            for signum in (signal.SIGTERM, signal.SIGINT)
+        }
+    except ValueError:
+        # signal.signal only works in the main thread
+        logger.warning(
+            "Event loop is not on the main thread; pending memories will not "
+            "be generated at shutdown"
+        )
+        return
+    _PREVIOUS_HANDLERS.update(previous)
+
+
+def _on_shutdown_signal(signum: int, frame: Any) -> None:
+    try:
+        _shutdown_loop.call_soon_threadsafe(_start_shutdown_flush, signum, frame)
+    except RuntimeError:
+        # The loop is closed; nothing can be flushed on it
+        _forward_signal(signum, frame)
+
+
+def _start_shutdown_flush(signum: int, frame: Any) -> None:
+    global _shutdown_task
+    if _shutdown_task is not None:
+        # A second signal while flushing stops the server right away
+        _forward_signal(signum, frame)
+        return
+    _shutdown_task = asyncio.get_running_loop().create_task(
+        _flush_then_forward(signum, frame)
+    )
+
+
+async def _flush_then_forward(signum: int, frame: Any) -> None:
+    """Generate memories still pending, then let the server shut down."""
+    schedulers = [scheduler for scheduler in list(_SCHEDULERS) if scheduler._pending]
+    try:
+        if schedulers:
+            pending = sum(len(scheduler._pending) for scheduler in schedulers)
+            logger.info(f"Generating memories for {pending} sessions at shutdown")
+            await asyncio.wait_for(
+                asyncio.gather(*(scheduler.flush_all() for scheduler in schedulers)),
+                SHUTDOWN_TIMEOUT_SECONDS,
+            )
+    except Exception as e:
+        logger.error(f"Could not generate memories at shutdown: {e!r}")
+    finally:
+        _forward_signal(signum, frame)
+
+
+def _forward_signal(signum: int, frame: Any) -> None:
+    previous = _PREVIOUS_HANDLERS.get(signum, signal.SIG_DFL)
+    if callable(previous):
+        previous(signum, frame)
+    elif previous == signal.SIG_DFL:
+        signal.signal(signum, signal.SIG_DFL)
+        signal.raise_signal(signum)
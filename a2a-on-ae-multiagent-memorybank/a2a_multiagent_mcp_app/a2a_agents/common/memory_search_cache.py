@@ -0,0 +1,131 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Per-user cache of Memory Bank search results.
+
+PreloadMemoryTool searches the user's memories before every model turn, with
+the user's message as the query. Within a conversation the result rarely
+changes, so results are cached by app, user and normalized query for a short
+TTL. The memory service drops a user's entries once a memory generation for
+them has completed, so new memories show up on the next search. Searches that
+were already running when the entries were dropped are not cached, since
+their results may predate the new memories.
+"""
+
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = float(os.getenv("MEMORY_SEARCH_CACHE_TTL_SECONDS", "60"))
+DEFAULT_MAX_ENTRIES = int(os.getenv("MEMORY_SEARCH_CACHE_MAX_ENTRIES", "1024"))
+
+
+def query_shape(query: str) -> str:
+    """Normalizes a query so trivially different phrasings share an entry."""
+    return re.sub(r"\s+", " ", query or "").strip().lower()
+
+
+class MemorySearchCache:
+    """LRU cache of search responses by (app name, user ID, query shape)."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl_seconds: Seconds to keep a search response; 0 disables caching.
+            max_entries: Maximum number of cached responses across all users.
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # (app name, user ID, query shape) -> (expiry on the monotonic clock,
+        # response)
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, Any]]" = (
+            OrderedDict()
+        )
+        # (app name, user ID) -> last invalidation on the monotonic clock,
+        # oldest first; searches take well under a TTL, so older ones are
+        # pruned
+        self._invalidated: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self.stats: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "invalidations": 0,
+        }
+
+    def get(self, app_name: str, user_id: str, query: str) -> Optional[Any]:
+        """Returns the cached response of a search, or None."""
+        if not self.ttl_seconds:
+            return None
+        key = (app_name, user_id, query_shape(query))
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            self._entries.pop(key, None)
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        logger.info(f"Memory search cache hit for {user_id}")
+        return entry[1]
+
+    def put(
+        self,
+        app_name: str,
+        user_id: str,
+        query: str,
+        response: Any,
+        started_at: Optional[float] = None,
+    ) -> None:
+        """
+        Stores the response of a search.
+
+        Args:
+            started_at: When the search started, on the monotonic clock. The
+                        response is dropped if the user's entries were
+                        invalidated since.
+        """
+        if not self.ttl_seconds:
+            return
+        invalidated_at = self._invalidated.get((app_name, user_id))
+        if started_at is not None and invalidated_at is not None:
+            if started_at <= invalidated_at:
+                return
+        key = (app_name, user_id, query_shape(query))
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, response)
+        self._entries.move_to_end(key)
+        self.stats["stores"] += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, app_name: str, user_id: str) -> None:
+        """Drops the cached responses of a user."""
+        now = time.monotonic()
+        self._invalidated[(app_name, user_id)] = now
+        self._invalidated.move_to_end((app_name, user_id))
+        while next(iter(self._invalidated.values())) < now - self.ttl_seconds:
+            self._invalidated.popitem(last=False)
+        keys = [key for key in self._entries if key[:2] == (app_name, user_id)]
+        for key in keys:
+            del self._entries[key]
+        if keys:
+            self.stats["invalidations"] += 1
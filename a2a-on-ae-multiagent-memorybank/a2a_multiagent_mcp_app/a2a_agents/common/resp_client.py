@@ -0,0 +1,200 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Minimal asyncio client for the Redis serialization protocol (RESP2).
+
+Just enough of the protocol to keep small keys in Redis, Memorystore or any
+RESP-compatible stand-in, without adding a Redis client to the agent's
+deployment requirements. One connection per event loop is opened lazily and
+commands on it are serialized.
+"""
+
+import asyncio
+import logging
+import ssl
+from typing import Any, List, Optional, Union
+from urllib.parse import unquote, urlparse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 6379
+DEFAULT_TIMEOUT_SECONDS = 2.0
+
+
+class RespError(Exception):
+    """Error reply sent by the server, e.g. WRONGTYPE or NOAUTH."""
+
+
+class RespClient:
+    """Single-connection RESP client configured from a redis:// URL."""
+
+    def __init__(self, url: str, timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS):
+        """
+        Initialize the client. No connection is made until the first command.
+
+        Args:
+            url: redis://[[user]:password@]host[:port][/db], or rediss:// for TLS
+                 (e.g. Memorystore with in-transit encryption).
+            timeout_seconds: Timeout for connecting and for each command.
+        """
+        parsed = urlparse(url)
+        if parsed.scheme not in ("redis", "rediss"):
+            raise ValueError(f"Unsupported session index URL scheme: {parsed.scheme}")
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or DEFAULT_PORT
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.use_tls = parsed.scheme == "rediss"
+        self.timeout_seconds = timeout_seconds
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def execute(self, *args: Union[str, bytes, int, float]) -> Any:
+        """
+        Send one command and return its decoded reply.
+
+        The connection is dropped on any I/O error or timeout, so the next
+        command reconnects.
+
+        Raises:
+            RespError: The server replied with an error.
+            OSError, asyncio.TimeoutError: The server could not be reached,
+                or closed the connection mid-reply (ConnectionError).
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Streams and locks are bound to the loop that created them
+            self._reader = self._writer = None
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        async with self._lock:
+            try:
+                if self._writer is None:
+                    await asyncio.wait_for(self._connect(), self.timeout_seconds)
+                return await asyncio.wait_for(self._call(args), self.timeout_seconds)
+            except (
+                asyncio.IncompleteReadError,
+                asyncio.LimitOverrunError,
+                ValueError,
+            ) as e:
+                # The server hung up or sent a malformed reply (ValueError is
+                # an unparsable length); callers treat it like any other
+                # connection failure
+                await self.close()
+                raise ConnectionError(
+                    f"RESP server {self.host}:{self.port} closed the connection"
+                ) from e
+            except (OSError, asyncio.TimeoutError, asyncio.CancelledError):
+                # A reply may still be in flight, so the stream can't be reused
+                await self.close()
+                raise
+
+    async def close(self) -> None:
+        """Close the connection, if open."""
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is None:
+            return
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (OSError, RuntimeError):
+            pass
+
+    async def _connect(self) -> None:
+        self._reader, self._writer = await asyncio.open_connection(
+            self.host,
+            self.port,
+            ssl=ssl.create_default_context() if self.use_tls else None,
+        )
+        try:
+            if self.password is not None:
+                credentials = (self.username, self.password) if self.username else (
+                    self.password,
+                )
+                await self._call(("AUTH", *credentials))
+            if self.db:
+                await self._call(("SELECT", self.db))
+        except RespError:
+            # Don't keep a connection that isn't authenticated or on the right db
+            await self.close()
+            raise
+        logger.info(f"Connected to RESP server {self.host}:{self.port}/{self.db}")
+
+    async def _call(self, args) -> Any:
+        self._writer.write(self._encode(args))
+        await self._writer.drain()
+        return await self._read_reply()
+
+    @staticmethod
+    def _encode(args) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(parts)
+
+    async def _read_reply(self) -> Any:
+        reply = await self._read_value()
+        error = _first_error(reply)
+        if error is not None:
+            raise error
+        return reply
+
+    async def _read_value(self) -> Any:
+        """Read one reply; error replies are returned as RespError values.
+
+        Arrays are read to the end even if an element is an error, so the
+        stream stays aligned with the commands sent on it.
+        """
+        line = await self._reader.readuntil(b"\r\n")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            return RespError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = await self._reader.readexactly(length + 2)
+            return data[:-2].decode()
+        if kind == b"*":
+            length = int(payload)
+            if length < 0:
+                return None
+            items: List[Any] = []
+            for _ in range(length):
+                items.append(await self._read_value())
+            return items
+        # The rest of the reply can't be skipped without knowing its type
+        # (e.g. a RESP3 map), so the stream can't be reused
+        await self.close()
+        raise RespError(f"Unexpected RESP reply: {line!r}")
+
+
+def _first_error(reply: Any) -> Optional[RespError]:
+    """The first error reply in a reply, including inside nested arrays."""
+    if isinstance(reply, RespError):
+        return reply
+    if isinstance(reply, list):
+        for item in reply:
+            error = _first_error(item)
+            if error is not None:
+                return error
+    return None
@@ -0,0 +1,275 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Rolling compaction of the conversation history sent to Gemini.
+
+ADK builds every model request from all events of the session, so prompts
+grow with the conversation. SessionCompactor is a before_model_callback that:
+
+1. Replaces the oldest history entries of the request with a summary, once
+   one has been written for them. The summary and the timestamp of the first
+   user turn it does not cover are kept in session state, so every replica
+   and later turn reuses them.
+2. When the remaining history passes a token or entry threshold, summarizes
+   everything but the last keep_recent_turns user turns in a background task,
+   folding in the previous summary. The turn that triggers it is not delayed;
+   the summary is applied from the next model call on.
+
+Each user message starts one history entry, so the entries a summary covers
+are found by counting the user turns of the session since its timestamp. This
+holds whether the session was loaded in full or only from that timestamp on
+(see windowed_session_service.py).
+"""
+
+import asyncio
+import json
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from google import genai
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.events import Event
+from google.adk.models import LlmRequest
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = os.getenv("COMPACTION_MODEL", "gemini-2.5-flash")
+DEFAULT_TOKEN_THRESHOLD = int(os.getenv("COMPACTION_TOKEN_THRESHOLD", "8000"))
+DEFAULT_EVENT_THRESHOLD = int(os.getenv("COMPACTION_EVENT_THRESHOLD", "40"))
+DEFAULT_KEEP_RECENT_TURNS = int(os.getenv("COMPACTION_KEEP_RECENT_TURNS", "3"))
+
+# Session state key holding {"summary", "through", "source_tokens"}, where
+# "through" is the timestamp of the oldest user turn kept verbatim
+STATE_KEY = "compaction"
+
+# Rough characters per token, to size history without a count_tokens call
+_CHARS_PER_TOKEN = 4
+# Function responses are clipped to this many characters in the summary prompt
+_MAX_RESPONSE_CHARS = 2000
+# Finished summaries waiting for their session's next model call
+_MAX_PENDING_SUMMARIES = 1024
+
+SUMMARY_PROMPT = """Summarize the earlier part of a conversation between a user and an AI assistant.
+The summary replaces these messages in the assistant's context, so keep every
+fact the assistant may need later: the user's requests, preferences, names,
+places and dates, the agents or tools used and the results they returned, and
+any open questions. Write concise plain text in the third person.
+
+{previous}Conversation:
+{transcript}"""
+
+
+def estimate_tokens(contents: List[types.Content]) -> int:
+    """Estimates the prompt tokens of history entries from their size."""
+    return sum(len(_render(content)) for content in contents) // _CHARS_PER_TOKEN
+
+
+def _render(content: types.Content, max_response_chars: Optional[int] = None) -> str:
+    """Renders one history entry as transcript text."""
+    lines = []
+    for part in content.parts or []:
+        if part.text:
+            lines.append(part.text)
+        elif part.function_call:
+            args = json.dumps(part.function_call.args or {}, default=str)
+            lines.append(f"[calls {part.function_call.name}({args})]")
+        elif part.function_response:
+            response = json.dumps(part.function_response.response or {}, default=str)
+            if max_response_chars and len(response) > max_response_chars:
+                response = response[:max_response_chars] + "..."
+            lines.append(f"[{part.function_response.name} returned {response}]")
+    return f"{content.role}: " + " ".join(lines)
+
+
+def user_turn_starts(contents: List[types.Content]) -> List[int]:
+    """Indices of the history entries holding a user message."""
+    return [
+        i
+        for i, content in enumerate(contents)
+        if content.role == "user" and any(part.text for part in content.parts or [])
+    ]
+
+
+def user_turn_events(events: List[Event]) -> List[Event]:
+    """Session events holding a user message, oldest first."""
+    return [
+        event
+        for event in events
+        if event.author == "user"
+        and event.content
+        and any(part.text for part in event.content.parts or [])
+    ]
+
+
+class SessionCompactor:
+    """before_model_callback replacing old history with a rolling summary."""
+
+    def __init__(
+        self,
+        model: str = DEFAULT_MODEL,
+        token_threshold: int = DEFAULT_TOKEN_THRESHOLD,
+        event_threshold: int = DEFAULT_EVENT_THRESHOLD,
+        keep_recent_turns: int = DEFAULT_KEEP_RECENT_TURNS,
+    ):
+        """
+        Initialize the compactor.
+
+        Args:
+            model: Gemini model writing the summaries.
+            token_threshold: Estimated history tokens that trigger a compaction.
+            event_threshold: History entries (one per event) that trigger a
+                             compaction.
+            keep_recent_turns: Most recent user turns always kept verbatim.
+        """
+        self.model = model
+        self.token_threshold = token_threshold
+        self.event_threshold = event_threshold
+        self.keep_recent_turns = keep_recent_turns
+        self._client: Optional[genai.Client] = None
+        # Background summaries by session ID
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.stats: Dict[str, int] = {
+            "summaries": 0,
+            "summary_errors": 0,
+            "compacted_requests": 0,
+            "tokens_saved": 0,
+        }
+
+    async def before_model_callback(
+        self, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> None:
+        """Applies the session's summary and schedules the next one if due."""
+        session = callback_context._invocation_context.session
+        contents = list(llm_request.contents)
+        turn_starts = user_turn_starts(contents)
+        turn_events = user_turn_events(session.events)
+        compaction = callback_context.state.get(STATE_KEY)
+
+        pending = self._pending.pop(session.id, None)
+        if pending and (not compaction or pending["through"] > compaction["through"]):
+            # Persisted with this invocation's next event
+            callback_context.state[STATE_KEY] = compaction = pending
+
+        covered = 0
+        kept_turns = min(len(turn_starts), len(turn_events))
+        if compaction:
+            kept_turns = sum(
+                1 for event in turn_events if event.timestamp >= compaction["through"]
+            )
+            if 0 < kept_turns <= len(turn_starts):
+                covered = turn_starts[-kept_turns]
+                summary = types.Content(
+                    role="user",
+                    parts=[
+                        types.Part(
+                            text="Summary of the earlier conversation:\n"
+                            + compaction["summary"]
+                        )
+                    ],
+                )
+                llm_request.contents = [summary] + contents[covered:]
+                saved = compaction["source_tokens"] - estimate_tokens([summary])
+                self.stats["compacted_requests"] += 1
+                self.stats["tokens_saved"] += max(saved, 0)
+                logger.info(
+                    f"Replaced the history of session {session.id} before its "
+                    f"last {kept_turns} user turns with a summary, saving "
+                    f"~{saved} tokens; compaction metrics: {self.stats}"
+                )
+
+        recent = contents[covered:]
+        if kept_turns > self.keep_recent_turns and (
+            estimate_tokens(recent) > self.token_threshold
+            or len(recent) > self.event_threshold
+        ):
+            self._schedule_summary(
+                session.id,
+                compaction,
+                recent,
+                boundary=turn_starts[-self.keep_recent_turns] - covered,
+                through=turn_events[-self.keep_recent_turns].timestamp,
+            )
+        return None
+
+    def _schedule_summary(
+        self,
+        session_id: str,
+        compaction: Optional[Dict[str, Any]],
+        contents: List[types.Content],
+        boundary: int,
+        through: float,
+    ) -> None:
+        task = self._tasks.get(session_id)
+        if task is not None and not task.done():
+            return
+        self._tasks[session_id] = asyncio.get_running_loop().create_task(
+            self._summarize(session_id, compaction, contents[:boundary], through)
+        )
+
+    async def _summarize(
+        self,
+        session_id: str,
+        compaction: Optional[Dict[str, Any]],
+        contents: List[types.Content],
+        through: float,
+    ) -> None:
+        """Summarizes contents on top of the previous summary, for the session."""
+        previous = (
+            f"Summary of the conversation before these messages:\n{compaction['summary']}\n\n"
+            if compaction
+            else ""
+        )
+        transcript = "\n".join(
+            _render(content, _MAX_RESPONSE_CHARS) for content in contents
+        )
+        try:
+            response = await self._get_client().aio.models.generate_content(
+                model=self.model,
+                contents=SUMMARY_PROMPT.format(
+                    previous=previous, transcript=transcript
+                ),
+                config=types.GenerateContentConfig(temperature=0),
+            )
+            summary = (response.text or "").strip()
+            if not summary:
+                raise ValueError("empty summary")
+        except Exception as e:
+            self.stats["summary_errors"] += 1
+            logger.warning(f"Could not summarize session {session_id}: {e}")
+            return
+        finally:
+            self._tasks.pop(session_id, None)
+
+        self._pending[session_id] = {
+            "summary": summary,
+            "through": through,
+            "source_tokens": (compaction["source_tokens"] if compaction else 0)
+            + estimate_tokens(contents),
+        }
+        while len(self._pending) > _MAX_PENDING_SUMMARIES:
+            self._pending.popitem(last=False)
+        self.stats["summaries"] += 1
+        logger.info(f"Summarized {len(contents)} history entries of session {session_id}")
+
+    def _get_client(self) -> genai.Client:
+        if self._client is None:
+            self._client = genai.Client(
+                vertexai=True,
+                project=os.environ.get("PROJECT_ID"),
+                location=os.environ.get("LOCATION"),
+            )
+        return self._client
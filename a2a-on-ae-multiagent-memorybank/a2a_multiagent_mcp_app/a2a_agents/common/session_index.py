@@ -0,0 +1,307 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Index from A2A context IDs to ADK session IDs, shared by the executors.
+
+The executors used to keep whole ADK Session objects, events included, in
+unbounded class-level dicts. The index keeps only the session ID per context,
+which is all the Runner needs. Two backends implement it:
+
+1. InMemorySessionIndex, the default, keeps the index in process memory and
+   evicts entries when they have not been used for idle_ttl_seconds, when it
+   holds more than max_entries contexts (least recently used first), or when
+   the estimated memory of the entries exceeds max_bytes.
+2. RedisSessionIndex keeps the index in Redis or Memorystore, so every
+   replica of an agent finds the session of a context, whichever replica
+   created it. Idle entries expire through a TTL that is refreshed on each
+   lookup; capacity is bounded by the server's maxmemory policy.
+
+Set SESSION_INDEX_REDIS_URL to use the Redis backend. An evicted or unknown
+context simply starts a new session on its next message; the old session
+remains in the session service.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from common.resp_client import RespClient, RespError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = int(os.getenv("SESSION_INDEX_MAX_ENTRIES", "10000"))
+DEFAULT_IDLE_TTL_SECONDS = float(
+    os.getenv("SESSION_INDEX_IDLE_TTL_SECONDS", str(6 * 60 * 60))
+)
+DEFAULT_MAX_BYTES = int(
+    os.getenv("SESSION_INDEX_MAX_BYTES", str(16 * 1024 * 1024))
+)
+DEFAULT_KEY_PREFIX = os.getenv("SESSION_INDEX_KEY_PREFIX", "a2a-session-index:")
+# After Redis is unreachable, skip it for this long instead of paying a
+# connect timeout on every turn
+REDIS_RETRY_AFTER_SECONDS = 10.0
+
+# Approximate per-entry overhead of the OrderedDict slot and value tuple
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+class SessionIndex(ABC):
+    """Maps A2A context IDs to ADK session IDs."""
+
+    @abstractmethod
+    async def get(self, context_id: str) -> Optional[str]:
+        """
+        Return the session ID of a context, refreshing its recency.
+
+        Args:
+            context_id: The A2A context ID.
+
+        Returns:
+            The session ID, or None if unknown or expired.
+        """
+
+    @abstractmethod
+    async def put(self, context_id: str, session_id: str) -> str:
+        """
+        Index the session of a context, unless the context already has one.
+
+        Args:
+            context_id: The A2A context ID.
+            session_id: The session created for the context.
+
+        Returns:
+            The session ID now indexed for the context. It differs from
+            session_id when another executor indexed a session first.
+        """
+
+    @abstractmethod
+    async def pop(self, context_id: str) -> Optional[str]:
+        """Forget a context, returning its session ID if it was indexed."""
+
+    @abstractmethod
+    def metrics(self) -> Dict[str, float]:
+        """Counters describing the index, for logging."""
+
+
+def create_session_index() -> SessionIndex:
+    """Build the session index backend selected by the environment."""
+    url = os.getenv("SESSION_INDEX_REDIS_URL")
+    if url:
+        return RedisSessionIndex(url)
+    return InMemorySessionIndex()
+
+
+class InMemorySessionIndex(SessionIndex):
+    """LRU + idle-TTL map of context_id -> session_id with a memory cap."""
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        idle_ttl_seconds: float = DEFAULT_IDLE_TTL_SECONDS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        """
+        Initialize the index.
+
+        Args:
+            max_entries: Maximum number of contexts kept.
+            idle_ttl_seconds: Contexts unused for this long are evicted.
+            max_bytes: Cap on the estimated memory used by the entries.
+        """
+        self.max_entries = max_entries
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_bytes = max_bytes
+        # context_id -> (session_id, last access on the monotonic clock),
+        # ordered from least to most recently used
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = {"idle": 0, "lru": 0, "memory": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, context_id: str) -> Optional[str]:
+        self._evict_idle()
+        entry = self._entries.get(context_id)
+        if entry is None:
+            self._misses += 1
+            return None
+        self._entries[context_id] = (entry[0], time.monotonic())
+        self._entries.move_to_end(context_id)
+        self._hits += 1
+        return entry[0]
+
+    async def put(self, context_id: str, session_id: str) -> str:
+        self._evict_idle()
+        entry = self._entries.get(context_id)
+        if entry is not None:
+            return entry[0]
+        self._entries[context_id] = (session_id, time.monotonic())
+        self._bytes += self._entry_bytes(context_id, session_id)
+        while len(self._entries) > self.max_entries:
+            self._evict_oldest("lru")
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            self._evict_oldest("memory")
+        return session_id
+
+    async def pop(self, context_id: str) -> Optional[str]:
+        return self._remove(context_id)
+
+    def _remove(self, context_id: str) -> Optional[str]:
+        entry = self._entries.pop(context_id, None)
+        if entry is None:
+            return None
+        self._bytes -= self._entry_bytes(context_id, entry[0])
+        return entry[0]
+
+    def metrics(self) -> Dict[str, float]:
+        """Size, estimated memory, evictions and hit rate of the index."""
+        lookups = self._hits + self._misses
+        return {
+            "size": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / lookups if lookups else 0.0,
+            **{f"evictions_{reason}": n for reason, n in self._evictions.items()},
+        }
+
+    def _evict_idle(self) -> None:
+        """Drop entries idle past the TTL; they sit at the LRU end."""
+        cutoff = time.monotonic() - self.idle_ttl_seconds
+        while self._entries:
+            context_id, (_, last_access) = next(iter(self._entries.items()))
+            if last_access > cutoff:
+                return
+            self._evict(context_id, "idle")
+
+    def _evict_oldest(self, reason: str) -> None:
+        self._evict(next(iter(self._entries)), reason)
+
+    def _evict(self, context_id: str, reason: str) -> None:
+        self._remove(context_id)
+        self._evictions[reason] += 1
+        logger.debug(f"Evicted context {context_id} from session index ({reason})")
+
+    @staticmethod
+    def _entry_bytes(context_id: str, session_id: str) -> int:
+        return (
+            sys.getsizeof(context_id)
+            + sys.getsizeof(session_id)
+            + _ENTRY_OVERHEAD_BYTES
+        )
+
+
+class RedisSessionIndex(SessionIndex):
+    """Session index in Redis, shared by every replica of the agents.
+
+    Keys are key_prefix + context_id and expire after idle_ttl_seconds without
+    a lookup. The index is an optimization: when Redis can't be reached,
+    lookups miss and the executor creates a new session, as it would for an
+    unknown context.
+
+    Uses GETEX and GETDEL, so the server must be Redis 6.2 or later (or a
+    compatible server implementing them).
+    """
+
+    def __init__(
+        self,
+        url: str,
+        idle_ttl_seconds: float = DEFAULT_IDLE_TTL_SECONDS,
+        key_prefix: str = DEFAULT_KEY_PREFIX,
+    ):
+        """
+        Initialize the index. No connection is made until the first lookup.
+
+        Args:
+            url: redis:// or rediss:// URL of the server, see RespClient.
+            idle_ttl_seconds: Contexts unused for this long expire.
+            key_prefix: Prefix of the keys, to share a database with other data.
+        """
+        self.client = RespClient(url)
+        self.ttl = max(1, int(idle_ttl_seconds))
+        self.key_prefix = key_prefix
+        self._hits = 0
+        self._misses = 0
+        self._errors = 0
+        self._retry_at = 0.0
+
+    async def get(self, context_id: str) -> Optional[str]:
+        try:
+            # GETEX refreshes the idle TTL in the same round trip
+            session_id = await self._execute(
+                "GETEX", self._key(context_id), "EX", self.ttl
+            )
+        except (OSError, asyncio.TimeoutError, RespError) as e:
+            self._errors += 1
+            logger.warning(f"Session index lookup failed for {context_id}: {e!r}")
+            return None
+        if session_id is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+        return session_id
+
+    async def put(self, context_id: str, session_id: str) -> str:
+        key = self._key(context_id)
+        try:
+            stored = await self._execute(
+                "SET", key, session_id, "NX", "EX", self.ttl
+            )
+            if stored is None:
+                # Another replica indexed the context first; use its session
+                existing = await self._execute("GETEX", key, "EX", self.ttl)
+                if existing is not None:
+                    return existing
+                await self._execute("SET", key, session_id, "EX", self.ttl)
+        except (OSError, asyncio.TimeoutError, RespError) as e:
+            self._errors += 1
+            logger.warning(f"Session index update failed for {context_id}: {e!r}")
+        return session_id
+
+    async def pop(self, context_id: str) -> Optional[str]:
+        try:
+            return await self._execute("GETDEL", self._key(context_id))
+        except (OSError, asyncio.TimeoutError, RespError) as e:
+            self._errors += 1
+            logger.warning(f"Session index delete failed for {context_id}: {e!r}")
+            return None
+
+    def metrics(self) -> Dict[str, float]:
+        """Hits, misses, hit rate and errors of this process's lookups."""
+        lookups = self._hits + self._misses
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / lookups if lookups else 0.0,
+            "errors": self._errors,
+        }
+
+    async def _execute(self, *args):
+        if time.monotonic() < self._retry_at:
+            raise ConnectionError("Session index backend unavailable")
+        try:
+            return await self.client.execute(*args)
+        except (OSError, asyncio.TimeoutError):
+            self._retry_at = time.monotonic() + REDIS_RETRY_AFTER_SECONDS
+            raise
+
+    def _key(self, context_id: str) -> str:
+        return f"{self.key_prefix}{context_id}"
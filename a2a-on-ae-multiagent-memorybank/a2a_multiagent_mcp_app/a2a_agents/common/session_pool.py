@@ -0,0 +1,284 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Pre-created Vertex AI sessions, so new conversations skip create_session.
+
+VertexAiSessionService.create_session is a remote write followed by polling
+its long-running operation, which costs a second or more on the first turn of
+every conversation. The pool keeps a few sessions created ahead of time and
+hands one out when a new context needs a session, then replaces it in the
+background.
+
+A Vertex session is bound to the user_id it was created with and cannot be
+reassigned, so sessions are pooled per user of the app: a user's first
+conversation in a process still creates its session inline and also fills
+that user's pool, and their later conversations claim pre-created sessions.
+Users who have not started a conversation for idle_ttl_seconds, or beyond
+max_users, are dropped and their unclaimed sessions deleted.
+
+Pre-created sessions are tagged "unclaimed" under POOL_STATE_KEY in their
+state. The first turn of a claimed session runs with claimed_state_delta(),
+which retags it as "claimed" in the same write as the user's message.
+Pooled sessions older than idle_ttl_seconds are never handed out; claims
+delete them instead. Sessions still pooled when a process stops are
+orphaned, so on its first claim each process sweeps the app for unclaimed
+sessions that no live pool can still hand out, and deletes them.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from google.adk.sessions import BaseSessionService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = int(os.getenv("SESSION_POOL_SIZE", "1"))
+DEFAULT_MAX_USERS = int(os.getenv("SESSION_POOL_MAX_USERS", "256"))
+DEFAULT_IDLE_TTL_SECONDS = float(
+    os.getenv("SESSION_POOL_IDLE_TTL_SECONDS", str(6 * 60 * 60))
+)
+POOL_STATE_KEY = "session_pool"
+UNCLAIMED = "unclaimed"
+CLAIMED = "claimed"
+
+
+class SessionPool:
+    """Per-user pools of sessions of one app, replenished in the background."""
+
+    def __init__(
+        self,
+        session_service: BaseSessionService,
+        app_name: str,
+        size: int = DEFAULT_POOL_SIZE,
+        max_users: int = DEFAULT_MAX_USERS,
+        idle_ttl_seconds: float = DEFAULT_IDLE_TTL_SECONDS,
+    ):
+        """
+        Initialize an empty pool.
+
+        Args:
+            session_service: The Runner's session service.
+            app_name: The Runner's app name.
+            size: Unclaimed sessions kept per user.
+            max_users: Maximum number of users with a pool.
+            idle_ttl_seconds: Pools of users without a new conversation for
+                              this long are dropped.
+        """
+        self.session_service = session_service
+        self.app_name = app_name
+        self.size = size
+        self.max_users = max_users
+        self.idle_ttl_seconds = idle_ttl_seconds
+        # user_id -> (unclaimed (session ID, creation) pairs, last claim), on
+        # the monotonic clock, ordered from least to most recently used
+        self._pools: "OrderedDict[str, Tuple[Deque[Tuple[str, float]], float]]" = (
+            OrderedDict()
+        )
+        self._refills: Dict[str, asyncio.Task] = {}
+        # Claimed pre-created sessions whose first turn has not run yet, with
+        # their creation on the monotonic clock
+        self._untagged: Dict[str, float] = {}
+        self._sweep: Optional[asyncio.Task] = None
+        # Strong references to fire-and-forget deletions
+        self._tasks: Set[asyncio.Task] = set()
+        self.stats: Dict[str, int] = {
+            "claimed": 0,
+            "created_inline": 0,
+            "precreated": 0,
+            "deleted": 0,
+            "swept": 0,
+            "errors": 0,
+        }
+
+    async def claim(self, user_id: str) -> str:
+        """
+        Return a session ID of the user for a new conversation.
+
+        Uses a pre-created session when one is available, otherwise creates
+        one inline. Either way the user's pool is then refilled in the
+        background.
+        """
+        if self._sweep is None:
+            self._sweep = asyncio.get_running_loop().create_task(
+                self.sweep_orphans()
+            )
+        self._evict_idle()
+        sessions, _ = self._pools.pop(user_id, (deque(), 0.0))
+        self._pools[user_id] = (sessions, time.monotonic())
+        while len(self._pools) > self.max_users:
+            self._evict(next(iter(self._pools)))
+
+        # Sessions pooled for longer may already be swept by another process
+        cutoff = time.monotonic() - self.idle_ttl_seconds
+        expired = []
+        while sessions and sessions[0][1] < cutoff:
+            expired.append(sessions.popleft()[0])
+        if expired:
+            self._delete_in_background(user_id, expired)
+
+        if sessions:
+            session_id, created = sessions.popleft()
+            self._untagged[session_id] = created
+            self.stats["claimed"] += 1
+            logger.info(f"Claimed pre-created session {session_id} for {user_id}")
+        else:
+            session = await self.session_service.create_session(
+                app_name=self.app_name, user_id=user_id
+            )
+            session_id = session.id
+            self.stats["created_inline"] += 1
+        self._schedule_refill(user_id)
+        return session_id
+
+    def release(self, user_id: str, session_id: str) -> None:
+        """Return an unused session of the user to the pool, or delete it."""
+        if session_id not in self._untagged:
+            # Created inline, so never tagged for the sweep
+            self._delete_in_background(user_id, [session_id])
+            return
+        created = self._untagged.pop(session_id)
+        entry = self._pools.get(user_id)
+        if entry is not None and len(entry[0]) < self.size:
+            entry[0].append((session_id, created))
+        else:
+            self._delete_in_background(user_id, [session_id])
+
+    def claimed_state_delta(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the state delta for a turn of a session, if it needs one.
+
+        The first turn of a claimed pre-created session passes this to
+        Runner.run_async, so the sweep no longer treats it as unclaimed.
+        """
+        if self._untagged.pop(session_id, None) is None:
+            return None
+        return {POOL_STATE_KEY: CLAIMED}
+
+    async def sweep_orphans(self) -> None:
+        """
+        Delete unclaimed sessions left behind by stopped processes.
+
+        claim() never hands out a session created more than idle_ttl_seconds
+        ago, whatever the pool size, so unclaimed sessions not updated for
+        twice that long (allowing for clock skew between hosts) are no
+        longer handed out by any live pool.
+        Needs a session service that lists the sessions of every user
+        (WindowedVertexAiSessionService); with others the sweep is skipped.
+        """
+        try:
+            response = await self.session_service.list_sessions(
+                app_name=self.app_name, user_id=None
+            )
+        except Exception as e:
+            logger.warning(f"Skipping the sweep of orphaned pooled sessions: {e}")
+            return
+        cutoff = time.time() - 2 * self.idle_ttl_seconds
+        orphans = [
+            session
+            for session in response.sessions
+            if session.state.get(POOL_STATE_KEY) == UNCLAIMED
+            and session.last_update_time < cutoff
+        ]
+        for session in orphans:
+            try:
+                await self.session_service.delete_session(
+                    app_name=self.app_name,
+                    user_id=session.user_id,
+                    session_id=session.id,
+                )
+                self.stats["swept"] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"Could not delete orphaned session {session.id}: {e}")
+        logger.info(f"Swept {self.stats['swept']} orphaned pooled sessions")
+
+    def metrics(self) -> Dict[str, int]:
+        """Users with a pool, unclaimed sessions and claim counters."""
+        return {
+            "users": len(self._pools),
+            "pooled": sum(len(sessions) for sessions, _ in self._pools.values()),
+            **self.stats,
+        }
+
+    def _schedule_refill(self, user_id: str) -> None:
+        task = self._refills.get(user_id)
+        loop = asyncio.get_running_loop()
+        if task is not None and not task.done() and task.get_loop() is loop:
+            return
+        self._refills[user_id] = loop.create_task(self._refill(user_id))
+
+    async def _refill(self, user_id: str) -> None:
+        """Create sessions until the user's pool is full or the user is dropped."""
+        try:
+            while True:
+                entry = self._pools.get(user_id)
+                if entry is None or len(entry[0]) >= self.size:
+                    return
+                try:
+                    session = await self.session_service.create_session(
+                        app_name=self.app_name,
+                        user_id=user_id,
+                        state={POOL_STATE_KEY: UNCLAIMED},
+                    )
+                except Exception as e:
+                    # The next claim creates inline and schedules a new refill
+                    self.stats["errors"] += 1
+                    logger.warning(f"Could not pre-create a session for {user_id}: {e}")
+                    return
+                entry = self._pools.get(user_id)
+                if entry is None:
+                    self._delete_in_background(user_id, [session.id])
+                    return
+                entry[0].append((session.id, time.monotonic()))
+                self.stats["precreated"] += 1
+        finally:
+            if self._refills.get(user_id) is asyncio.current_task():
+                del self._refills[user_id]
+
+    def _evict_idle(self) -> None:
+        """Drop pools of idle users; they sit at the LRU end."""
+        cutoff = time.monotonic() - self.idle_ttl_seconds
+        while self._pools:
+            user_id, (_, last_claim) = next(iter(self._pools.items()))
+            if last_claim > cutoff:
+                return
+            self._evict(user_id)
+
+    def _evict(self, user_id: str) -> None:
+        sessions, _ = self._pools.pop(user_id)
+        if sessions:
+            self._delete_in_background(
+                user_id, [session_id for session_id, _ in sessions]
+            )
+
+    def _delete_in_background(self, user_id: str, session_ids: List[str]) -> None:
+        task = asyncio.get_running_loop().create_task(
+            self._delete(user_id, session_ids)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _delete(self, user_id: str, session_ids: List[str]) -> None:
+        for session_id in session_ids:
+            try:
+                await self.session_service.delete_session(
+                    app_name=self.app_name, user_id=user_id, session_id=session_id
+                )
+                self.stats["deleted"] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"Could not delete unclaimed session {session_id}: {e}")
@@ -0,0 +1,451 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""SQLite session service for running the orchestrator without Agent Engine.
+
+InMemorySessionService loses every session on restart and can't be shared by
+several worker processes. SqliteSessionService keeps sessions, events and
+app/user state in one SQLite database in WAL mode, so any number of processes
+on the host can read while one writes:
+
+1. Sessions and events are looked up through their primary keys and an index
+   on (app_name, user_id, session_id, timestamp), so loading the recent
+   events of a session does not scan the others.
+2. Event appends are group-committed: appends arriving within
+   batch_window_seconds are written in one transaction, and each append
+   returns once its transaction has committed.
+
+SQLite calls run on a small thread pool, one connection per thread, so they
+never block the event loop.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session, State
+from google.adk.sessions.base_session_service import (
+    GetSessionConfig,
+    ListSessionsResponse,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.getenv("SESSION_DB_PATH", "sessions.db")
+DEFAULT_BATCH_WINDOW_SECONDS = 0.005
+DEFAULT_MAX_BATCH_SIZE = 256
+# How long a connection waits for another process's write transaction
+BUSY_TIMEOUT_SECONDS = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS app_states (
+    app_name TEXT PRIMARY KEY,
+    state TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS user_states (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id)
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    update_time REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, id)
+);
+CREATE TABLE IF NOT EXISTS events (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id, session_id, id)
+);
+CREATE INDEX IF NOT EXISTS events_by_session_time
+    ON events (app_name, user_id, session_id, timestamp);
+"""
+
+# (app_name, user_id, session_id, event)
+_PendingEvent = Tuple[str, str, str, Event]
+
+
+def _split_state(state: Dict[str, Any]) -> Tuple[Dict, Dict, Dict]:
+    """Splits a state (delta) into app, user and session parts, minus temp keys."""
+    app_state, user_state, session_state = {}, {}, {}
+    for key, value in (state or {}).items():
+        if key.startswith(State.APP_PREFIX):
+            app_state[key[len(State.APP_PREFIX) :]] = value
+        elif key.startswith(State.USER_PREFIX):
+            user_state[key[len(State.USER_PREFIX) :]] = value
+        elif not key.startswith(State.TEMP_PREFIX):
+            session_state[key] = value
+    return app_state, user_state, session_state
+
+
+def _merge_state(app_state: Dict, user_state: Dict, session_state: Dict) -> Dict:
+    """Builds the state seen by the agent from its stored parts."""
+    merged = dict(session_state)
+    merged.update({State.APP_PREFIX + key: value for key, value in app_state.items()})
+    merged.update({State.USER_PREFIX + key: value for key, value in user_state.items()})
+    return merged
+
+
+class SqliteSessionService(BaseSessionService):
+    """ADK session service storing sessions in a SQLite database (WAL mode)."""
+
+    def __init__(
+        self,
+        db_path: str = DEFAULT_DB_PATH,
+        batch_window_seconds: float = DEFAULT_BATCH_WINDOW_SECONDS,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_threads: int = 4,
+    ):
+        """
+        Initialize the service, creating the database schema if needed.
+
+        Args:
+            db_path: Path of the SQLite database file, shared by every process
+                     that should see the same sessions.
+            batch_window_seconds: How long an append waits for others to
+                                  share its transaction.
+            max_batch_size: Maximum number of events written per transaction.
+            max_threads: Threads (and connections) running SQLite calls.
+        """
+        self.db_path = db_path
+        self.batch_window_seconds = batch_window_seconds
+        self.max_batch_size = max_batch_size
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_threads, thread_name_prefix="sqlite-sessions"
+        )
+        self._local = threading.local()
+        self._pending: List[Tuple[_PendingEvent, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self.stats: Dict[str, int] = {"batches": 0, "events": 0, "largest_batch": 0}
+
+        connection = self._connection()
+        connection.executescript(_SCHEMA)
+        logger.info(f"Using SQLite session database {os.path.abspath(db_path)}")
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session_id = (session_id or "").strip() or str(uuid.uuid4())
+        return await self._run(
+            self._create_session, app_name, user_id, dict(state or {}), session_id
+        )
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        return await self._run(self._get_session, app_name, user_id, session_id, config)
+
+    async def list_sessions(
+        self, *, app_name: str, user_id: str
+    ) -> ListSessionsResponse:
+        return await self._run(self._list_sessions, app_name, user_id)
+
+    async def delete_session(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> None:
+        await self._run(self._delete_session, app_name, user_id, session_id)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        loop = asyncio.get_running_loop()
+        committed = loop.create_future()
+        self._pending.append(
+            ((session.app_name, session.user_id, session.id, event), committed)
+        )
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._flush())
+        await committed
+
+        await super().append_event(session=session, event=event)
+        session.last_update_time = max(session.last_update_time, event.timestamp)
+        return event
+
+    async def _flush(self) -> None:
+        """Writes pending appends in batches, one transaction per batch."""
+        await asyncio.sleep(self.batch_window_seconds)
+        while self._pending:
+            batch = self._pending[: self.max_batch_size]
+            del self._pending[: self.max_batch_size]
+            try:
+                await self._run(self._write_events, [item for item, _ in batch])
+            except Exception as e:
+                if len(batch) == 1:
+                    self._settle(batch, e)
+                    continue
+                # Don't fail every append for one bad event; retry them alone
+                for entry in batch:
+                    try:
+                        await self._run(self._write_events, [entry[0]])
+                    except Exception as e:
+                        self._settle([entry], e)
+                    else:
+                        self._settle([entry])
+                continue
+            self._settle(batch)
+            self.stats["batches"] += 1
+            self.stats["events"] += len(batch)
+            self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+
+    @staticmethod
+    def _settle(
+        batch: List[Tuple[_PendingEvent, asyncio.Future]],
+        error: Optional[BaseException] = None,
+    ) -> None:
+        """Completes the appends of a batch, with the error if it failed."""
+        for _, committed in batch:
+            if committed.done():
+                continue
+            if error is None:
+                committed.set_result(None)
+            else:
+                committed.set_exception(error)
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, function, *args
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Returns this thread's connection, opening it on first use."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # Autocommit mode; write transactions are opened explicitly
+            connection = sqlite3.connect(
+                self.db_path, timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _write(self, function, *args):
+        """Runs function(connection, *args) in a write transaction."""
+        connection = self._connection()
+        # Take the write lock up front so concurrent processes wait on
+        # busy_timeout instead of failing on lock upgrade
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            result = function(connection, *args)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return result
+
+    def _create_session(
+        self, app_name: str, user_id: str, state: Dict, session_id: str
+    ) -> Session:
+        app_delta, user_delta, session_state = _split_state(state)
+
+        def create(connection: sqlite3.Connection) -> Session:
+            app_state = self._update_app_state(connection, app_name, app_delta)
+            user_state = self._update_user_state(connection, app_name, user_id, user_delta)
+            now = time.time()
+            try:
+                connection.execute(
+                    "INSERT INTO sessions VALUES (?, ?, ?, ?, ?)",
+                    (app_name, user_id, session_id, json.dumps(session_state), now),
+                )
+            except sqlite3.IntegrityError:
+                raise ValueError(f"Session {session_id} already exists.") from None
+            return Session(
+                app_name=app_name,
+                user_id=user_id,
+                id=session_id,
+                state=_merge_state(app_state, user_state, session_state),
+                last_update_time=now,
+            )
+
+        return self._write(create)
+
+    def _get_session(
+        self,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig],
+    ) -> Optional[Session]:
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT state, update_time FROM sessions"
+            " WHERE app_name = ? AND user_id = ? AND id = ?",
+            (app_name, user_id, session_id),
+        ).fetchone()
+        if row is None:
+            return None
+
+        query = (
+            "SELECT data FROM events"
+            " WHERE app_name = ? AND user_id = ? AND session_id = ?"
+        )
+        params: List[Any] = [app_name, user_id, session_id]
+        if config and config.after_timestamp:
+            query += " AND timestamp >= ?"
+            params.append(config.after_timestamp)
+        query += " ORDER BY timestamp DESC"
+        if config and config.num_recent_events:
+            query += " LIMIT ?"
+            params.append(config.num_recent_events)
+        events = [
+            Event.model_validate_json(data)
+            for (data,) in connection.execute(query, params).fetchall()
+        ]
+        events.reverse()
+
+        return Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=session_id,
+            state=_merge_state(
+                self._load_state(connection, "app_states", app_name),
+                self._load_state(connection, "user_states", app_name, user_id),
+                json.loads(row[0]),
+            ),
+            events=events,
+            last_update_time=row[1],
+        )
+
+    def _list_sessions(self, app_name: str, user_id: str) -> ListSessionsResponse:
+        rows = self._connection().execute(
+            "SELECT id, state, update_time FROM sessions"
+            " WHERE app_name = ? AND user_id = ?",
+            (app_name, user_id),
+        ).fetchall()
+        return ListSessionsResponse(
+            sessions=[
+                Session(
+                    app_name=app_name,
+                    user_id=user_id,
+                    id=session_id,
+                    state=json.loads(state),
+                    last_update_time=update_time,
+                )
+                for session_id, state, update_time in rows
+            ]
+        )
+
+    def _delete_session(self, app_name: str, user_id: str, session_id: str) -> None:
+        def delete(connection: sqlite3.Connection) -> None:
+            key = (app_name, user_id, session_id)
+            connection.execute(
+                "DELETE FROM events"
+                " WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                key,
+            )
+            connection.execute(
+                "DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                key,
+            )
+
+        self._write(delete)
+
+    def _write_events(self, batch: List[_PendingEvent]) -> None:
+        def write(connection: sqlite3.Connection) -> None:
+            for app_name, user_id, session_id, event in batch:
+                state_delta = event.actions.state_delta if event.actions else None
+                app_delta, user_delta, session_delta = _split_state(state_delta)
+                self._update_app_state(connection, app_name, app_delta)
+                self._update_user_state(connection, app_name, user_id, user_delta)
+                row = connection.execute(
+                    "SELECT state FROM sessions"
+                    " WHERE app_name = ? AND user_id = ? AND id = ?",
+                    (app_name, user_id, session_id),
+                ).fetchone()
+                if row is None:
+                    raise ValueError(f"Session {session_id} not found.")
+                session_state = json.loads(row[0])
+                session_state.update(session_delta)
+                connection.execute(
+                    "UPDATE sessions SET state = ?, update_time = MAX(update_time, ?)"
+                    " WHERE app_name = ? AND user_id = ? AND id = ?",
+                    (
+                        json.dumps(session_state),
+                        event.timestamp,
+                        app_name,
+                        user_id,
+                        session_id,
+                    ),
+                )
+                connection.execute(
+                    "INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        app_name,
+                        user_id,
+                        session_id,
+                        event.id,
+                        event.timestamp,
+                        event.model_dump_json(exclude_none=True),
+                    ),
+                )
+
+        self._write(write)
+
+    def _update_app_state(
+        self, connection: sqlite3.Connection, app_name: str, delta: Dict
+    ) -> Dict:
+        state = self._load_state(connection, "app_states", app_name)
+        if delta:
+            state.update(delta)
+            connection.execute(
+                "INSERT OR REPLACE INTO app_states VALUES (?, ?)",
+                (app_name, json.dumps(state)),
+            )
+        return state
+
+    def _update_user_state(
+        self, connection: sqlite3.Connection, app_name: str, user_id: str, delta: Dict
+    ) -> Dict:
+        state = self._load_state(connection, "user_states", app_name, user_id)
+        if delta:
+            state.update(delta)
+            connection.execute(
+                "INSERT OR REPLACE INTO user_states VALUES (?, ?, ?)",
+                (app_name, user_id, json.dumps(state)),
+            )
+        return state
+
+    @staticmethod
+    def _load_state(connection: sqlite3.Connection, table: str, *key: str) -> Dict:
+        """Loads app_states by app_name, or user_states by app_name and user_id."""
+        where = "app_name = ?" if len(key) == 1 else "app_name = ? AND user_id = ?"
+        row = connection.execute(
+            f"SELECT state FROM {table} WHERE {where}", key
+        ).fetchone()
+        return json.loads(row[0]) if row else {}
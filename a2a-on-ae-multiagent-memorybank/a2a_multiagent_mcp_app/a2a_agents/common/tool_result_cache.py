@@ -0,0 +1,145 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Agent-side cache of MCP tool results, wired in as ADK tool callbacks.
+
+Results are memoized by tool name and canonicalized arguments, for the TTL
+configured per tool under "tool_cache_ttl_seconds" in agent_configs.py. Tools
+without a TTL (e.g. list_random_cocktails) are always called. The cache lives
+for the lifetime of the agent process, so hits skip the MCP round trip both
+within a session and across sessions and users.
+"""
+
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 1024
+
+
+def canonical_args(args: Dict[str, Any]) -> str:
+    """Serializes tool arguments so equal calls map to the same cache key."""
+
+    def normalize(value: Any) -> Any:
+        if isinstance(value, str):
+            return value.strip()
+        if isinstance(value, dict):
+            return {key: normalize(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [normalize(item) for item in value]
+        return value
+
+    return json.dumps(
+        normalize(args or {}), sort_keys=True, separators=(",", ":"), default=str
+    )
+
+
+def is_cacheable(tool_response: Any) -> bool:
+    """Whether a tool response may be replayed: not an error and not empty.
+
+    MCP tool errors, e.g. an upstream API outage reported by the server, may
+    be transient, and an empty result says nothing worth keeping. Handles
+    CallToolResult objects and their dict dumps.
+    """
+    if tool_response is None:
+        return False
+    if isinstance(tool_response, dict):
+        is_error = tool_response.get("isError", False)
+        content = tool_response.get("content")
+    else:
+        is_error = getattr(tool_response, "isError", False)
+        content = getattr(tool_response, "content", None)
+    if is_error:
+        return False
+    if content is None:
+        # Not an MCP result; cache whatever the tool returned
+        return True
+    for item in content:
+        text = item.get("text") if isinstance(item, dict) else getattr(item, "text", None)
+        if text is None or text.strip():
+            # Non-text content, or text with something in it
+            return True
+    return False
+
+
+class ToolResultCache:
+    """LRU cache of tool responses with a TTL per tool name."""
+
+    def __init__(
+        self,
+        ttl_seconds: Dict[str, float],
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl_seconds: Seconds to keep results, by tool name. Tools that are
+                         missing or have a falsy TTL are never cached.
+            max_entries: Maximum number of cached results across all tools.
+        """
+        self.ttl_seconds = dict(ttl_seconds)
+        self.max_entries = max_entries
+        # (tool name, canonical args) -> (expiry on the monotonic clock, response)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = (
+            OrderedDict()
+        )
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0}
+
+    def before_tool_callback(
+        self, tool, args: Dict[str, Any], tool_context
+    ) -> Optional[Any]:
+        """ADK before_tool_callback: returns a cached response to skip the call."""
+        if not self.ttl_seconds.get(tool.name):
+            return None
+        key = (tool.name, canonical_args(args))
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            self._entries.pop(key, None)
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        logger.info(f"Tool result cache hit for {tool.name}")
+        return entry[1]
+
+    def after_tool_callback(
+        self, tool, args: Dict[str, Any], tool_context, tool_response: Any
+    ) -> Optional[Any]:
+        """ADK after_tool_callback: stores successful responses, never alters them."""
+        ttl = self.ttl_seconds.get(tool.name)
+        if not ttl or not is_cacheable(tool_response):
+            return None
+        key = (tool.name, canonical_args(args))
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] is tool_response:
+            # Served from the cache by before_tool_callback, keep its expiry
+            return None
+        self._entries[key] = (time.monotonic() + ttl, tool_response)
+        self._entries.move_to_end(key)
+        self.stats["stores"] += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return None
+
+    def invalidate(self, tool_name: Optional[str] = None) -> None:
+        """Drops cached results of one tool, or of every tool."""
+        if tool_name is None:
+            self._entries.clear()
+            return
+        for key in [key for key in self._entries if key[0] == tool_name]:
+            del self._entries[key]
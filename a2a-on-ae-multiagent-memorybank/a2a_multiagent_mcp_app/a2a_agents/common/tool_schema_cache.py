@@ -0,0 +1,146 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Cache of MCP tool schemas keyed by server URL and server version.
+
+The weather and cocktail MCP servers only change their tools on deploy, and
+advertise a hash of their tool schemas as the MCP server version. Toolsets
+keep the listed tools per URL and list them again only when a freshly
+initialized session reports a different version, or after invalidate().
+
+Deploy scripts bake a snapshot of the current schemas into the common package
+(mcp_tool_snapshot.json), so a cold agent instance can answer its first turn
+without listing tools at all. The snapshot is a build artifact: it is
+regenerated on every deploy and not checked in.
+"""
+
+import json
+import logging
+import os
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+from mcp.types import Tool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "mcp_tool_snapshot.json"
+)
+
+
+def server_version(initialize_result) -> str:
+    """Builds the cache version string from an MCP InitializeResult."""
+    info = initialize_result.serverInfo
+    return f"{info.name}/{info.version}"
+
+
+class ToolSchemaCache:
+    """Tool schemas per MCP server URL, tagged with the server version."""
+
+    def __init__(self, snapshot_path: Optional[str] = None):
+        """
+        Initialize the cache, preloading a snapshot if one exists.
+
+        Args:
+            snapshot_path: JSON snapshot written by write_snapshot. Defaults to
+                           MCP_TOOL_SNAPSHOT_PATH, then the file shipped with
+                           the common package.
+        """
+        self._entries: Dict[str, Dict] = {}
+        path = snapshot_path or os.getenv(
+            "MCP_TOOL_SNAPSHOT_PATH", DEFAULT_SNAPSHOT_PATH
+        )
+        if os.path.exists(path):
+            self.load_snapshot(path)
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Returns {"version": str, "tools": List[Tool]} for a URL, if cached."""
+        return self._entries.get(url)
+
+    def put(self, url: str, version: str, tools: List[Tool]) -> None:
+        """Stores the tools listed from a server at a given version."""
+        self._entries[url] = {"version": version, "tools": list(tools)}
+        logger.info(f"Cached {len(tools)} MCP tool schemas for {url} at {version}")
+
+    def invalidate(self, url: Optional[str] = None) -> None:
+        """Drops the cached tools of one URL, or of every URL."""
+        if url is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(url, None)
+
+    def load_snapshot(self, path: str) -> None:
+        """Loads entries from a snapshot file, ignoring it if unreadable."""
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+            for url, entry in snapshot.items():
+                tools = [Tool.model_validate(tool) for tool in entry["tools"]]
+                self._entries[url] = {"version": entry["version"], "tools": tools}
+            versions = {url: entry["version"] for url, entry in snapshot.items()}
+            logger.info(f"Loaded MCP tool schema snapshot {path}: {versions}")
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring MCP tool schema snapshot {path}: {e}")
+
+    def write_snapshot(self, path: str = DEFAULT_SNAPSHOT_PATH) -> None:
+        """Writes every cached entry to a snapshot file."""
+        snapshot = {
+            url: {
+                "version": entry["version"],
+                "tools": [
+                    tool.model_dump(mode="json", exclude_none=True)
+                    for tool in entry["tools"]
+                ],
+            }
+            for url, entry in self._entries.items()
+        }
+        with open(path, "w") as f:
+            json.dump(snapshot, f, indent=2, sort_keys=True)
+
+
+# Shared by every toolset in the process, like the session maps of the executors
+TOOL_SCHEMA_CACHE = ToolSchemaCache()
+
+
+async def snapshot_tool_schemas(
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    path: str = DEFAULT_SNAPSHOT_PATH,
+) -> str:
+    """
+    Lists the tools of a deployed MCP server and adds them to a snapshot file.
+
+    Called by the deploy scripts before packaging the common directory.
+
+    Args:
+        url: MCP server URL, as used by the agent.
+        headers: Auth headers for the server.
+        path: Snapshot file to update.
+
+    Returns:
+        The tool schema version of the server.
+    """
+    cache = ToolSchemaCache(snapshot_path=path)
+    async with streamablehttp_client(
+        url, headers=headers, timeout=timedelta(seconds=30)
+    ) as (read_stream, write_stream, _):
+        async with ClientSession(read_stream, write_stream) as session:
+            result = await session.initialize()
+            tools = (await session.list_tools()).tools
+    version = server_version(result)
+    cache.put(url, version, tools)
+    cache.write_snapshot(path)
+    return version
@@ -0,0 +1,287 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Vertex AI session service that loads only the recent part of a session.
+
+VertexAiSessionService.get_session lists every event of the session, page by
+page, on every turn, and only then applies GetSessionConfig. This subclass:
+
+1. Lists only the events the agents still use: those at or after the
+   session's compaction timestamp (see session_compaction.py), or all events
+   of sessions that were never compacted, capped at the last max_events.
+2. Keeps the loaded events per session in a local LRU cache. Later turns list
+   only the events added since the newest cached one, and list nothing when
+   the session's update time has not changed.
+
+Session state still comes from the session resource on every call, so state
+written by other replicas is always current. list_sessions also accepts no
+user_id, listing the sessions of every user of the app (used by the startup
+sweep of session_pool.py).
+
+Reads go through the public Vertex AI SDK (client.aio.agent_engines.sessions)
+rather than the internals of VertexAiSessionService, which change between ADK
+releases; writes use the inherited public methods.
+"""
+
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import vertexai
+from google.adk.events import Event, EventActions
+from google.adk.sessions import Session, VertexAiSessionService
+from google.adk.sessions.base_session_service import (
+    GetSessionConfig,
+    ListSessionsResponse,
+)
+
+from common.session_compaction import STATE_KEY as COMPACTION_STATE_KEY
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_EVENTS = int(os.getenv("SESSION_MAX_LOADED_EVENTS", "200"))
+DEFAULT_MAX_CACHED_SESSIONS = int(os.getenv("SESSION_EVENT_CACHE_MAX_SESSIONS", "256"))
+# Events appended by other replicas may carry slightly older timestamps than
+# the newest cached event; incremental loads look back this far and dedupe
+CLOCK_SKEW_SECONDS = 5.0
+
+
+class _CachedEvents:
+    """Events loaded for one session and the update time they reflect."""
+
+    __slots__ = ("events", "update_time")
+
+    def __init__(self, events: List[Event], update_time: Optional[float]):
+        self.events = events
+        self.update_time = update_time
+
+
+def _from_sdk_event(api_event: Any) -> Event:
+    """Converts a session event of the Vertex AI SDK to an ADK event."""
+    actions = api_event.actions
+    metadata = api_event.event_metadata
+    long_running_tool_ids = metadata.long_running_tool_ids if metadata else None
+    return Event(
+        id=api_event.name.split("/")[-1],
+        invocation_id=api_event.invocation_id or "",
+        author=api_event.author,
+        content=api_event.content,
+        actions=EventActions(
+            skip_summarization=actions.skip_summarization,
+            state_delta=actions.state_delta or {},
+            artifact_delta=actions.artifact_delta or {},
+            transfer_to_agent=actions.transfer_agent,
+            escalate=actions.escalate,
+            requested_auth_configs=actions.requested_auth_configs or {},
+        )
+        if actions
+        else EventActions(),
+        timestamp=api_event.timestamp.timestamp(),
+        error_code=api_event.error_code,
+        error_message=api_event.error_message,
+        partial=metadata.partial if metadata else None,
+        turn_complete=metadata.turn_complete if metadata else None,
+        interrupted=metadata.interrupted if metadata else None,
+        branch=metadata.branch if metadata else None,
+        custom_metadata=metadata.custom_metadata if metadata else None,
+        grounding_metadata=metadata.grounding_metadata if metadata else None,
+        long_running_tool_ids=set(long_running_tool_ids)
+        if long_running_tool_ids
+        else None,
+    )
+
+
+class WindowedVertexAiSessionService(VertexAiSessionService):
+    """VertexAiSessionService with windowed, incremental event loading."""
+
+    def __init__(
+        self,
+        project: Optional[str] = None,
+        location: Optional[str] = None,
+        agent_engine_id: Optional[str] = None,
+        max_events: int = DEFAULT_MAX_EVENTS,
+        max_cached_sessions: int = DEFAULT_MAX_CACHED_SESSIONS,
+    ):
+        """
+        Initialize the service.
+
+        Args:
+            project: The project id of the project to use.
+            location: The location of the project to use.
+            agent_engine_id: The resource ID of the agent engine to use.
+            max_events: Most recent events kept per session.
+            max_cached_sessions: Sessions whose events are cached locally.
+        """
+        super().__init__(
+            project=project, location=location, agent_engine_id=agent_engine_id
+        )
+        self.project = project
+        self.location = location
+        self.agent_engine_id = agent_engine_id
+        self._client: Optional[vertexai.Client] = None
+        self.max_events = max_events
+        self.max_cached_sessions = max_cached_sessions
+        self._cache: "OrderedDict[str, _CachedEvents]" = OrderedDict()
+        self.stats: Dict[str, int] = {
+            "full_loads": 0,
+            "incremental_loads": 0,
+            "unchanged": 0,
+            "events_listed": 0,
+        }
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        load_start_time = time.time()
+        session_name = f"{self._engine_name(app_name)}/sessions/{session_id}"
+
+        api_session = await self._get_client().aio.agent_engines.sessions.get(
+            name=session_name
+        )
+        if api_session.user_id != user_id:
+            raise ValueError(f"Session not found: {session_id}")
+        update_time = api_session.update_time.timestamp()
+        state = api_session.session_state or {}
+        window_start = (state.get(COMPACTION_STATE_KEY) or {}).get("through")
+
+        cached = self._cache.get(session_id)
+        if cached is not None and cached.update_time == update_time:
+            self.stats["unchanged"] += 1
+            events = cached.events
+        elif cached is not None and cached.events:
+            self.stats["incremental_loads"] += 1
+            known = {event.id for event in cached.events}
+            since = cached.events[-1].timestamp - CLOCK_SKEW_SECONDS
+            new_events = await self._list_events(session_name, since)
+            events = cached.events + [
+                event for event in new_events if event.id not in known
+            ]
+        else:
+            self.stats["full_loads"] += 1
+            events = await self._list_events(session_name, window_start)
+
+        events = sorted(
+            (event for event in events if event.timestamp <= update_time),
+            key=lambda event: event.timestamp,
+        )
+        if window_start is not None:
+            events = [event for event in events if event.timestamp >= window_start]
+        events = events[-self.max_events :]
+        self._store(session_id, _CachedEvents(events, update_time))
+
+        session = Session(
+            app_name=str(app_name),
+            user_id=str(user_id),
+            id=str(session_id),
+            state=state,
+            # The Runner appends to this list, so never hand out the cached one
+            events=list(events),
+            last_update_time=update_time,
+        )
+        if config:
+            if config.num_recent_events:
+                session.events = session.events[-config.num_recent_events :]
+            elif config.after_timestamp:
+                session.events = [
+                    event
+                    for event in session.events
+                    if event.timestamp >= config.after_timestamp
+                ]
+        logger.info(
+            f"Loaded {len(session.events)} events of session {session_id} in "
+            f"{time.time() - load_start_time:.2f} seconds; "
+            f"session load metrics: {self.stats}"
+        )
+        return session
+
+    async def list_sessions(
+        self, *, app_name: str, user_id: Optional[str] = None
+    ) -> ListSessionsResponse:
+        """Lists sessions without events, of one user or of every user."""
+        config = {"filter": f'user_id="{user_id}"'} if user_id else None
+        pager = await self._get_client().aio.agent_engines.sessions.list(
+            name=self._engine_name(app_name), config=config
+        )
+        sessions = [
+            Session(
+                app_name=str(app_name),
+                user_id=api_session.user_id,
+                id=api_session.name.split("/")[-1],
+                state=api_session.session_state or {},
+                last_update_time=api_session.update_time.timestamp(),
+            )
+            async for api_session in pager
+        ]
+        return ListSessionsResponse(sessions=sessions)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        event = await super().append_event(session=session, event=event)
+        cached = self._cache.get(session.id)
+        if cached is not None and not event.partial:
+            # The server stores the event under a new ID, so the next load
+            # lists it along with any events appended by other replicas
+            cached.update_time = None
+        return event
+
+    async def delete_session(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> None:
+        self._cache.pop(session_id, None)
+        await super().delete_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+
+    async def _list_events(
+        self, session_name: str, since: Optional[float] = None
+    ) -> List[Event]:
+        """Lists the events of a session, only those at or after since if set."""
+        config = None
+        if since is not None:
+            timestamp = datetime.fromtimestamp(since, tz=timezone.utc).isoformat()
+            config = {"filter": f'timestamp>="{timestamp}"'}
+        pager = await self._get_client().aio.agent_engines.sessions.events.list(
+            name=session_name, config=config
+        )
+        events = [_from_sdk_event(api_event) async for api_event in pager]
+        self.stats["events_listed"] += len(events)
+        return events
+
+    def _engine_name(self, app_name: str) -> str:
+        """Resource name of the agent engine holding the app's sessions."""
+        # Like VertexAiSessionService, the app name may be the engine ID
+        agent_engine_id = self.agent_engine_id or app_name.split("/")[-1]
+        return (
+            f"projects/{self.project}/locations/{self.location}/"
+            f"reasoningEngines/{agent_engine_id}"
+        )
+
+    def _get_client(self) -> vertexai.Client:
+        if self._client is None:
+            self._client = vertexai.Client(
+                project=self.project, location=self.location
+            )
+        return self._client
+
+    def _store(self, session_id: str, cached: _CachedEvents) -> None:
+        self._cache[session_id] = cached
+        self._cache.move_to_end(session_id)
+        while len(self._cache) > self.max_cached_sessions:
+            self._cache.popitem(last=False)
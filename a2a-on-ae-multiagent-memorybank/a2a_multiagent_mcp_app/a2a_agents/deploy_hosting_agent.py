@@ -61,6 +61,10 @@ BUCKET_URI = f"gs://{BUCKET_NAME}"
 COCKTAIL_AGENT_URL = os.getenv("COCKTAIL_AGENT_URL")
 WEA_AGENT_URL = os.getenv("WEA_AGENT_URL")
 
+# Optional Redis/Memorystore URL for the context -> session index, so every
+# replica of the agent resumes the same session for a conversation.
+SESSION_INDEX_REDIS_URL = os.getenv("SESSION_INDEX_REDIS_URL")
+
 # Validate essential environment variables
 if not PROJECT_ID:
     raise ValueError("PROJECT_ID environment variable is not set. Please set it in your .env file.")
@@ -163,6 +167,11 @@ remote_a2a_agent = client.agent_engines.update(
             "WEA_AGENT_URL": WEA_AGENT_URL,
             "PROJECT_ID": PROJECT_ID,
             "LOCATION": LOCATION,
+            **(
+                {"SESSION_INDEX_REDIS_URL": SESSION_INDEX_REDIS_URL}
+                if SESSION_INDEX_REDIS_URL
+                else {}
+            ),
             "GOOGLE_CLOUD_AGENT_ENGINE_ENABLE_TELEMETRY": "true",
             "OTEL_INSTRUMENTATION_GENAI_CAPTURE_MESSAGE_CONTENT": "true",
         },
@@ -16,6 +16,8 @@ from google.auth.transport.requests import Request as AuthRequest
 # Import the Agent Card and Agent Executor specific to the Weather Agent
 from weather_agent.weather_agent_card import weather_agent_card
 from weather_agent.weather_agent_executor import WeatherAgentExecutor
+from common.adk_base_mcp_agent_executor import get_gcp_auth_headers
+from common.tool_schema_cache import snapshot_tool_schemas
 
 # Import the A2aAgent class from Vertex AI SDK for deployment
 from vertexai.preview.reasoning_engines import A2aAgent
@@ -60,6 +62,10 @@ BUCKET_URI = f"gs://{BUCKET_NAME}"
 # This is a critical dependency for the Weather Agent to function.
 WEA_MCP_SERVER_URL = os.getenv("WEA_MCP_SERVER_URL")
 
+# Optional Redis/Memorystore URL for the context -> session index, so every
+# replica of the agent resumes the same session for a conversation.
+SESSION_INDEX_REDIS_URL = os.getenv("SESSION_INDEX_REDIS_URL")
+
 # Validate essential environment variables
 if not PROJECT_ID:
     raise ValueError("PROJECT_ID environment variable is not set. Please set it in your .env file.")
@@ -116,6 +122,23 @@ agent_engine_resource_name = (
     f"projects/{PROJECT_NUMBER}/locations/{LOCATION}/reasoningEngines/{weather_agent_engine_id}"
 )
 
+# --- Snapshot MCP Tool Schemas ---
+# Bake the MCP server's current tool schemas into the common package, so cold
+# agent instances skip tool discovery. The agent lists tools again if the
+# server reports a different tool schema version.
+try:
+    version = asyncio.run(
+        snapshot_tool_schemas(
+            WEA_MCP_SERVER_URL, headers=get_gcp_auth_headers(WEA_MCP_SERVER_URL)
+        )
+    )
+    logger.info(f"Saved Weather MCP tool schema snapshot at {version}.")
+except Exception as e:
+    logger.warning(
+        f"Could not snapshot Weather MCP tool schemas, the agent will list them "
+        f"at runtime: {e}"
+    )
+
 # --- Define the A2A Agent for Deployment ---
 # The A2aAgent class wraps our agent's logic (card and executor) for deployment
 # to Agent Engine.
@@ -158,6 +181,11 @@ remote_a2a_agent = client.agent_engines.update(
             "WEA_MCP_SERVER_URL": WEA_MCP_SERVER_URL,
             "PROJECT_ID": PROJECT_ID,
             "LOCATION": LOCATION,
+            **(
+                {"SESSION_INDEX_REDIS_URL": SESSION_INDEX_REDIS_URL}
+                if SESSION_INDEX_REDIS_URL
+                else {}
+            ),
             "GOOGLE_CLOUD_AGENT_ENGINE_ENABLE_TELEMETRY": "true",
             "OTEL_INSTRUMENTATION_GENAI_CAPTURE_MESSAGE_CONTENT": "true"
         },
@@ -0,0 +1,217 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests RedisSessionIndex against a local asyncio RESP stand-in.
+
+Run from this directory, so that the common package is importable:
+
+    python -m pytest test_session_index.py
+    python test_session_index.py
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+from common import session_index
+from common.resp_client import RespClient, RespError
+from common.session_index import RedisSessionIndex
+
+
+class RespStandIn:
+    """Just enough of a Redis server for the session index.
+
+    Implements GETEX, SET [NX] [EX], GETDEL and GET. With hang_up set, it
+    reads the next command, sends half a reply and closes the connection.
+    Replies queued in canned_replies are sent instead of the real ones.
+    """
+
+    def __init__(self):
+        self.data: Dict[str, str] = {}
+        self.commands: List[List[str]] = []
+        self.connections = 0
+        self.hang_up = False
+        self.canned_replies: List[bytes] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"redis://{host}:{port}/0"
+
+    async def __aenter__(self) -> "RespStandIn":
+        self._server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _serve(self, reader, writer) -> None:
+        self.connections += 1
+        try:
+            while True:
+                args = await self._read_command(reader)
+                self.commands.append(args)
+                if self.hang_up:
+                    writer.write(b"$36\r\nhalf-a-repl")
+                    await writer.drain()
+                    return
+                if self.canned_replies:
+                    writer.write(self.canned_replies.pop(0))
+                else:
+                    writer.write(self._reply(args))
+                await writer.drain()
+        except asyncio.IncompleteReadError:
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_command(reader) -> List[str]:
+        count = int((await reader.readuntil(b"\r\n"))[1:-2])
+        args = []
+        for _ in range(count):
+            length = int((await reader.readuntil(b"\r\n"))[1:-2])
+            args.append((await reader.readexactly(length + 2))[:-2].decode())
+        return args
+
+    def _reply(self, args: List[str]) -> bytes:
+        command, key = args[0].upper(), args[1] if len(args) > 1 else None
+        if command == "SET":
+            if "NX" in (arg.upper() for arg in args[3:]) and key in self.data:
+                return b"$-1\r\n"
+            self.data[key] = args[2]
+            return b"+OK\r\n"
+        if command in ("GET", "GETEX"):
+            return self._bulk(self.data.get(key))
+        if command == "GETDEL":
+            return self._bulk(self.data.pop(key, None))
+        return b"-ERR unknown command\r\n"
+
+    @staticmethod
+    def _bulk(value: Optional[str]) -> bytes:
+        if value is None:
+            return b"$-1\r\n"
+        return b"$%d\r\n%s\r\n" % (len(value), value.encode())
+
+
+async def _round_trip():
+    async with RespStandIn() as server:
+        index = RedisSessionIndex(server.url, idle_ttl_seconds=60)
+        assert await index.get("ctx") is None
+        assert await index.put("ctx", "session-1") == "session-1"
+        # SET NX loses to the first writer, whose session is returned
+        assert await index.put("ctx", "session-2") == "session-1"
+        assert await index.get("ctx") == "session-1"
+        assert ["GETEX", "a2a-session-index:ctx", "EX", "60"] in server.commands
+        assert await index.pop("ctx") == "session-1"
+        assert await index.get("ctx") is None
+        assert index.metrics()["errors"] == 0
+
+
+async def _hang_up_degrades_to_miss():
+    async with RespStandIn() as server:
+        index = RedisSessionIndex(server.url)
+        await index.put("ctx", "session-1")
+        server.hang_up = True
+        assert await index.get("ctx") is None
+        assert index.metrics()["errors"] == 1
+
+
+async def _breaker_skips_backend_then_recovers():
+    async with RespStandIn() as server:
+        index = RedisSessionIndex(server.url)
+        await index.put("ctx", "session-1")
+        server.hang_up = True
+        assert await index.get("ctx") is None
+        commands = len(server.commands)
+        # Within the retry window the server is not contacted at all
+        assert await index.get("ctx") is None
+        assert await index.put("other", "session-2") == "session-2"
+        assert await index.pop("ctx") is None
+        assert len(server.commands) == commands
+        assert index.metrics()["errors"] == 4
+
+        server.hang_up = False
+        index._retry_at = time.monotonic() - 1
+        assert await index.get("ctx") == "session-1"
+        assert server.connections == 2
+
+
+async def _client_raises_connection_error_on_hang_up():
+    async with RespStandIn() as server:
+        client = RespClient(server.url)
+        server.hang_up = True
+        try:
+            await client.execute("GET", "ctx")
+        except ConnectionError:
+            pass
+        else:
+            raise AssertionError("expected ConnectionError")
+        server.hang_up = False
+        assert await client.execute("GET", "ctx") is None
+        await client.close()
+
+
+async def _client_stays_aligned_after_bad_replies():
+    async with RespStandIn() as server:
+        client = RespClient(server.url)
+        await client.execute("SET", "ctx", "session-1")
+        # An error element inside an array, then a RESP3 map
+        for reply, expected in (
+            (b"*2\r\n-ERR first\r\n+second\r\n", "ERR first"),
+            (b"%1\r\n+key\r\n+value\r\n", "Unexpected RESP reply"),
+        ):
+            server.canned_replies = [reply]
+            try:
+                await client.execute("GET", "ctx")
+            except RespError as e:
+                assert expected in str(e)
+            else:
+                raise AssertionError("expected RespError")
+            # The next command reads its own reply
+            assert await client.execute("GET", "ctx") == "session-1"
+        # Only the unknown reply type dropped the connection
+        assert server.connections == 2
+        await client.close()
+
+
+def test_round_trip():
+    asyncio.run(_round_trip())
+
+
+def test_hang_up_degrades_to_miss():
+    asyncio.run(_hang_up_degrades_to_miss())
+
+
+def test_breaker_skips_backend_then_recovers():
+    assert session_index.REDIS_RETRY_AFTER_SECONDS > 1
+    asyncio.run(_breaker_skips_backend_then_recovers())
+
+
+def test_client_raises_connection_error_on_hang_up():
+    asyncio.run(_client_raises_connection_error_on_hang_up())
+
+
+def test_client_stays_aligned_after_bad_replies():
+    asyncio.run(_client_stays_aligned_after_bad_replies())
+
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_hang_up_degrades_to_miss()
+    test_breaker_skips_backend_then_recovers()
+    test_client_raises_connection_error_on_hang_up()
+    test_client_stays_aligned_after_bad_replies()
+    print("All session index tests passed.")
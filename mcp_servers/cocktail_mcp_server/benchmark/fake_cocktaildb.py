@@ -0,0 +1,222 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Local stand-in for TheCocktailDB used to benchmark the cocktail MCP server.
+
+Serves recorded search.php, lookup.php and random.php payloads from a fixture
+file, with injectable latency, HTTP errors and the API's quirky "null" string
+responses. Upstream traffic is counted and exposed on /stats.
+
+Usage:
+    # Serve the bundled sample fixture on port 8090
+    python fake_cocktaildb.py serve --latency-ms 80 --jitter-ms 40
+
+    # Point the MCP server at it
+    COCKTAILDB_BASE_URL=http://localhost:8090/api/json/v1/1/ uv run cocktail_server.py
+
+    # Record a full fixture from the live API
+    python fake_cocktaildb.py record --out fixtures/cocktaildb_full.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import string
+from collections import Counter
+from typing import Any, Dict, List
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FIXTURE = os.path.join(SCRIPT_DIR, "fixtures", "cocktaildb_sample.json")
+LIVE_API_BASE_URL = "https://www.thecocktaildb.com/api/json/v1/1/"
+API_PREFIX = "/api/json/v1/1"
+
+
+class FakeCocktailDB:
+    """Answers TheCocktailDB queries from recorded drinks and ingredients."""
+
+    def __init__(
+        self,
+        fixture: Dict[str, List[Dict[str, Any]]],
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        null_rate: float = 0.0,
+        seed: int | None = None,
+    ):
+        self.drinks = fixture.get("drinks", [])
+        self.drinks_by_id = {drink["idDrink"]: drink for drink in self.drinks}
+        self.ingredients = {
+            ingredient["strIngredient"].lower(): ingredient
+            for ingredient in fixture.get("ingredients", [])
+        }
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.null_rate = null_rate
+        self.random = random.Random(seed)
+        self.requests: Counter = Counter()
+        self.injected: Counter = Counter()
+
+    def search(self, params) -> Dict[str, Any]:
+        """search.php: by name (s), first letter (f) or ingredient name (i)."""
+        if "i" in params:
+            ingredient = self.ingredients.get(params["i"].strip().lower())
+            return {"ingredients": [ingredient] if ingredient else None}
+        if "f" in params:
+            first = params["f"].lower()[:1]
+            matches = [d for d in self.drinks if d["strDrink"].lower().startswith(first)]
+        else:
+            name = params.get("s", "").strip().lower()
+            matches = [d for d in self.drinks if name in d["strDrink"].lower()]
+        return {"drinks": matches or None}
+
+    def lookup(self, params) -> Dict[str, Any]:
+        """lookup.php: a single drink by ID (i)."""
+        drink = self.drinks_by_id.get(params.get("i", ""))
+        return {"drinks": [drink] if drink else None}
+
+    def random_drink(self, params) -> Dict[str, Any]:
+        """random.php: one uniformly chosen drink."""
+        return {"drinks": [self.random.choice(self.drinks)] if self.drinks else None}
+
+    async def handle(self, request: Request) -> Response:
+        """Applies the injected latency and faults, then answers the query."""
+        endpoint = request.path_params["endpoint"]
+        handler = {
+            "search.php": self.search,
+            "lookup.php": self.lookup,
+            "random.php": self.random_drink,
+        }.get(endpoint)
+        self.requests[endpoint] += 1
+
+        delay_ms = self.latency_ms + self.random.uniform(0, self.jitter_ms)
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+        if handler is None:
+            return Response("Not Found", status_code=404)
+        if self.random.random() < self.error_rate:
+            self.injected["error"] += 1
+            return Response("Service Unavailable", status_code=503)
+        if self.random.random() < self.null_rate:
+            # The live API sometimes answers with a JSON "null" string
+            self.injected["null"] += 1
+            return JSONResponse("null")
+        return JSONResponse(handler(request.query_params))
+
+    async def stats(self, request: Request) -> Response:
+        """Reports upstream request counts and injected faults."""
+        return JSONResponse(
+            {
+                "requests": sum(self.requests.values()),
+                "by_endpoint": dict(self.requests),
+                "injected": dict(self.injected),
+            }
+        )
+
+    async def reset(self, request: Request) -> Response:
+        """Clears the request and fault counters."""
+        self.requests.clear()
+        self.injected.clear()
+        return JSONResponse({"status": "reset"})
+
+    def app(self) -> Starlette:
+        """Builds the Starlette app serving the API and the stats endpoints."""
+        return Starlette(
+            routes=[
+                Route(f"{API_PREFIX}/{{endpoint}}", self.handle),
+                Route("/stats", self.stats),
+                Route("/stats/reset", self.reset, methods=["POST"]),
+            ]
+        )
+
+
+async def record_fixture(out_path: str) -> None:
+    """Records every drink and each referenced ingredient from the live API."""
+    async with httpx.AsyncClient(base_url=LIVE_API_BASE_URL, timeout=30.0) as client:
+
+        async def get(endpoint: str, params: Dict[str, str]) -> Dict[str, Any]:
+            response = await client.get(endpoint, params=params)
+            response.raise_for_status()
+            data = response.json()
+            return data if isinstance(data, dict) else {}
+
+        pages = await asyncio.gather(
+            *(
+                get("search.php", {"f": first})
+                for first in string.ascii_lowercase + string.digits
+            )
+        )
+        drinks = [drink for page in pages for drink in (page.get("drinks") or [])]
+
+        names = sorted(
+            {
+                drink[f"strIngredient{i}"].strip()
+                for drink in drinks
+                for i in range(1, 16)
+                if drink.get(f"strIngredient{i}")
+            }
+        )
+        results = await asyncio.gather(*(get("search.php", {"i": n}) for n in names))
+        ingredients = [r["ingredients"][0] for r in results if r.get("ingredients")]
+
+    with open(out_path, "w") as f:
+        json.dump({"drinks": drinks, "ingredients": ingredients}, f, indent=1)
+    print(f"Recorded {len(drinks)} drinks and {len(ingredients)} ingredients")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Serve recorded payloads")
+    serve.add_argument("--fixture", default=DEFAULT_FIXTURE)
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8090)
+    serve.add_argument("--latency-ms", type=float, default=0.0)
+    serve.add_argument("--jitter-ms", type=float, default=0.0)
+    serve.add_argument("--error-rate", type=float, default=0.0)
+    serve.add_argument("--null-rate", type=float, default=0.0)
+    serve.add_argument("--seed", type=int, default=None)
+
+    record = commands.add_parser("record", help="Record a fixture from the live API")
+    record.add_argument("--out", required=True)
+
+    args = parser.parse_args()
+    if args.command == "record":
+        asyncio.run(record_fixture(args.out))
+        return
+
+    with open(args.fixture) as f:
+        fixture = json.load(f)
+    fake = FakeCocktailDB(
+        fixture,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        null_rate=args.null_rate,
+        seed=args.seed,
+    )
+    uvicorn.run(fake.app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
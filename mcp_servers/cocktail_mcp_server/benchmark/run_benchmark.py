@@ -0,0 +1,172 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Mixed concurrent MCP tool workload against the cocktail MCP server.
+
+Reports throughput, per-tool latency percentiles and upstream TheCocktailDB
+calls per tool call, read from the fake API's /stats endpoint.
+
+Usage:
+    python run_benchmark.py --concurrency 16 --calls 1000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Tuple
+
+import httpx
+from fastmcp import Client
+
+from fake_cocktaildb import DEFAULT_FIXTURE
+
+# (tool name, relative weight) of the default mix, roughly what the cocktail
+# agent issues in practice
+DEFAULT_MIX = {
+    "search_cocktail_by_name": 25,
+    "lookup_cocktail_details_by_id": 25,
+    "list_cocktails_by_first_letter": 10,
+    "lookup_cocktails_by_ids": 10,
+    "list_random_cocktails": 10,
+    "search_ingredient_by_name": 10,
+    "find_similar_cocktails": 10,
+}
+
+
+def build_arg_makers(
+    fixture: Dict[str, List[Dict[str, Any]]], rng: random.Random
+) -> Dict[str, Callable[[], Dict[str, Any]]]:
+    """Returns a random argument generator per tool, drawn from the fixture."""
+    ids = [drink["idDrink"] for drink in fixture["drinks"]]
+    names = [drink["strDrink"] for drink in fixture["drinks"]]
+    ingredients = [i["strIngredient"] for i in fixture.get("ingredients", [])]
+    return {
+        "search_cocktail_by_name": lambda: {"name": rng.choice(names)},
+        "lookup_cocktail_details_by_id": lambda: {"cocktail_id": rng.choice(ids)},
+        "list_cocktails_by_first_letter": lambda: {
+            "letter": rng.choice(names)[0] if rng.random() < 0.9 else "q"
+        },
+        "lookup_cocktails_by_ids": lambda: {
+            "cocktail_ids": rng.sample(ids, min(len(ids), 5))
+        },
+        "list_random_cocktails": lambda: {},
+        "search_ingredient_by_name": lambda: {
+            "name": rng.choice(ingredients) if ingredients else "vodka"
+        },
+        "find_similar_cocktails": lambda: {"cocktail_id": rng.choice(ids)},
+    }
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+async def run_worker(
+    server_url: str,
+    plan: asyncio.Queue,
+    latencies: Dict[str, List[float]],
+    errors: Dict[str, int],
+) -> None:
+    """Drains the shared plan of (tool, args) calls over one MCP session."""
+    async with Client(server_url) as client:
+        while True:
+            try:
+                tool, args = plan.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            try:
+                await client.call_tool(tool, args)
+            except Exception:
+                errors[tool] += 1
+            latencies[tool].append((time.perf_counter() - start) * 1000)
+
+
+async def run_benchmark(args: argparse.Namespace) -> None:
+    with open(args.fixture) as f:
+        fixture = json.load(f)
+    rng = random.Random(args.seed)
+    arg_makers = build_arg_makers(fixture, rng)
+    mix = json.loads(args.mix) if args.mix else DEFAULT_MIX
+    tools, weights = zip(*mix.items())
+
+    plan: asyncio.Queue[Tuple[str, Dict[str, Any]]] = asyncio.Queue()
+    for tool in rng.choices(tools, weights=weights, k=args.calls):
+        plan.put_nowait((tool, arg_makers[tool]()))
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    async with httpx.AsyncClient(base_url=args.fake_url) as stats_client:
+        await stats_client.post("/stats/reset")
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(
+                run_worker(args.server_url, plan, latencies, errors)
+                for _ in range(args.concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - start
+        upstream = (await stats_client.get("/stats")).json()
+
+    total_calls = sum(len(samples) for samples in latencies.values())
+    all_samples = [ms for samples in latencies.values() for ms in samples]
+    print(
+        f"{total_calls} calls in {elapsed:.2f}s with concurrency "
+        f"{args.concurrency}: {total_calls / elapsed:.1f} calls/s"
+    )
+    print(
+        f"Upstream requests: {upstream['requests']} "
+        f"({upstream['requests'] / max(total_calls, 1):.2f} per tool call), "
+        f"by endpoint {upstream['by_endpoint']}, injected {upstream['injected']}"
+    )
+    header = (
+        f"{'tool':<32}{'calls':>7}{'errors':>8}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    )
+    print(header)
+    print("-" * len(header))
+    rows = sorted(latencies.items()) + [("ALL", all_samples)]
+    for tool, samples in rows:
+        errs = sum(errors.values()) if tool == "ALL" else errors[tool]
+        print(
+            f"{tool:<32}{len(samples):>7}{errs:>8}"
+            f"{percentile(samples, 50):>10.1f}"
+            f"{percentile(samples, 95):>10.1f}"
+            f"{percentile(samples, 99):>10.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--server-url", default="http://localhost:8080/mcp")
+    parser.add_argument("--fake-url", default="http://localhost:8090")
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument(
+        "--mix", default=None, help='JSON tool weights, e.g. {"list_random_cocktails": 1}'
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run_benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -13,27 +13,107 @@
 # limitations under the License.
 # Author: Dave Wang
 
-from typing import Any, Dict, Optional
+import hashlib
+import os
+import random
+import string
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
 import httpx
+import numpy as np
 from fastmcp import FastMCP
+from fastmcp.exceptions import ToolError
 import asyncio
 
+from drink_catalog import MappedCatalog
+
 # Initialize FastMCP server
 mcp = FastMCP("cocktail MCP server")
 
 # Constants
-API_BASE_URL = "https://www.thecocktaildb.com/api/json/v1/1/"
+# Overridable so benchmarks can target the local stand-in in benchmark/
+API_BASE_URL = os.getenv(
+    "COCKTAILDB_BASE_URL", "https://www.thecocktaildb.com/api/json/v1/1/"
+)
+
+# Catalog snapshot built into the image by `drink_catalog.py build`
+CATALOG_PATH = os.getenv(
+    "COCKTAIL_CATALOG_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "drink_catalog.bin"),
+)
+
+MAX_BATCH_IDS = 25  # Maximum number of IDs accepted by a single batch lookup
+MAX_CONCURRENT_LOOKUPS = 8  # Upper bound on in-flight lookup.php requests
+RANDOM_RESERVOIR_SIZE = 10  # Random drinks kept ready for list_random_cocktails
+DEFAULT_PAGE_SIZE = 10  # Drinks per page for list and search results
+MAX_PAGE_SIZE = 50
+MAX_RESPONSE_BYTES = 8000  # Hard budget for a single list or search response
+MAX_SIMILAR_RESULTS = 20
+# Category and glass matter, but less than what is actually in the drink
+INGREDIENT_WEIGHT = 1.0
+STYLE_WEIGHT = 0.5
+CATALOG_RETRY_BASE_SECONDS = 30  # Delay after the first failed catalog load
+CATALOG_RETRY_MAX_SECONDS = 600
 
 http_client = httpx.AsyncClient(base_url=API_BASE_URL, timeout=30.0)
 
+# --- Drink Cache ---
+# Parsed drink records keyed by idDrink. search.php, random.php and lookup.php
+# all return the complete record, so every response is reused for later
+# lookups. The upstream catalog only holds a few hundred drinks, which keeps
+# this bounded without an eviction policy.
+drink_cache: Dict[str, "DrinkRecord"] = {}
+lookup_semaphore = asyncio.Semaphore(MAX_CONCURRENT_LOOKUPS)
+
+# --- Random Reservoir ---
+# Drinks prefetched from random.php so list_random_cocktails can answer without
+# an upstream round trip. Each served drink is replaced in the background.
+random_reservoir: Deque["DrinkRecord"] = deque(maxlen=RANDOM_RESERVOIR_SIZE)
+random_refill_task: Optional[asyncio.Task] = None
+
+# --- Mapped Catalog ---
+# Memory-mapped at startup when the snapshot exists. Worker processes share
+# its pages, and lookups, listings and random picks need no upstream call.
+mapped_catalog: Optional[MappedCatalog] = None
+if os.path.exists(CATALOG_PATH):
+    try:
+        mapped_catalog = MappedCatalog(CATALOG_PATH)
+        print(f"Mapped {len(mapped_catalog)} drinks from {CATALOG_PATH}")
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable catalog {CATALOG_PATH}: {e}")
+
+# --- Catalog & Similarity Index ---
+# The full drink catalog, loaded once through search.php?f=<letter>, and the
+# feature matrix built from it for find_similar_cocktails.
+similarity_index: Optional["SimilarityIndex"] = None
+catalog_lock = asyncio.Lock()
+# Backoff after a failed catalog load, on the monotonic clock
+catalog_failures = 0
+catalog_retry_at = 0.0
+
 
 # --- Helper Functions ---
 
 
+class CocktailDBUnavailable(ToolError):
+    """TheCocktailDB failed to answer, as opposed to answering "no results".
+
+    Raised out of a tool, it becomes an MCP error result, which agents
+    neither cache nor mistake for "no such cocktail".
+    """
+
+
 async def make_cocktaildb_request(
     endpoint: str, params: Optional[Dict[str, str]] = None
 ) -> Optional[Dict[str, Any]]:
-    """Makes a request to TheCocktailDB API using the shared client."""
+    """Makes a request to TheCocktailDB API using the shared client.
+
+    Returns None when the API has no results.
+
+    Raises:
+        CocktailDBUnavailable: The request failed or the reply was not JSON.
+    """
     # Use the shared http_client, don't create a new one.
     try:
         response = await http_client.get(endpoint, params=params)
@@ -52,52 +132,365 @@ async def make_cocktaildb_request(
 
     except httpx.HTTPStatusError as e:
         print(f"HTTP error occurred: {e}")
-        return None
-    except httpx.RequestError as e:
+        raise CocktailDBUnavailable(
+            f"TheCocktailDB returned HTTP {e.response.status_code}, please try again later."
+        ) from e
+    except (httpx.RequestError, ValueError) as e:
         print(f"An error occurred while requesting {endpoint!r}: {e}")
-        return None
+        raise CocktailDBUnavailable(
+            "TheCocktailDB could not be reached, please try again later."
+        ) from e
 
 
-def format_cocktail_summary(drink: Dict[str, Any]) -> str:
-    """Formats a cocktail dictionary into a readable summary string."""
+class DrinkRecord:
+    """A drink parsed once from a TheCocktailDB payload.
+
+    Ingredients are kept as (ingredient, measure) tuples so the 15 numbered
+    strIngredientN/strMeasureN keys are only probed at parse time. The summary
+    and detail strings are rendered on first use and reused afterwards.
+    """
+
+    __slots__ = (
+        "id",
+        "name",
+        "alternate_name",
+        "tags",
+        "category",
+        "iba",
+        "alcoholic",
+        "glass",
+        "instructions",
+        "thumbnail",
+        "date_modified",
+        "ingredients",
+        "_summary",
+        "_details",
+    )
+
+    def __init__(self, drink: Dict[str, Any]):
+        self.id = drink.get("idDrink", "N/A")
+        self.name = drink.get("strDrink", "N/A")
+        self.alternate_name = drink.get("strDrinkAlternate", "None")
+        self.tags = drink.get("strTags", "None")
+        self.category = drink.get("strCategory", "N/A")
+        self.iba = drink.get("strIBA", "None")
+        self.alcoholic = drink.get("strAlcoholic", "N/A")
+        self.glass = drink.get("strGlass", "N/A")
+        self.instructions = drink.get("strInstructions", "N/A")
+        self.thumbnail = drink.get("strDrinkThumb", "N/A")
+        self.date_modified = drink.get("dateModified", "N/A")
+
+        ingredients = []
+        for i in range(1, 16):
+            ingredient = drink.get(f"strIngredient{i}")
+            if ingredient and ingredient.strip():
+                measure = drink.get(f"strMeasure{i}")
+                ingredients.append(
+                    (ingredient.strip(), measure.strip() if measure else "")
+                )
+        self.ingredients: Tuple[Tuple[str, str], ...] = tuple(ingredients)
+        self._summary: Optional[str] = None
+        self._details: Optional[str] = None
+
+    @property
+    def ingredient_names(self) -> Tuple[str, ...]:
+        """The ingredient names, in recipe order."""
+        return tuple(name for name, _ in self.ingredients)
+
+    @property
+    def summary(self) -> str:
+        """The rendered summary, see format_cocktail_summary."""
+        if self._summary is None:
+            self._summary = format_cocktail_summary(self)
+        return self._summary
+
+    @property
+    def details(self) -> str:
+        """The rendered details, see format_cocktail_details."""
+        if self._details is None:
+            self._details = format_cocktail_details(self)
+        return self._details
+
+
+def cache_drinks(drinks: List[Dict[str, Any]]) -> List[DrinkRecord]:
+    """Parses drink payloads into records, reusing cached unchanged records."""
+    records = []
+    for drink in drinks:
+        record = drink_cache.get(drink.get("idDrink"))
+        if record is None or record.date_modified != drink.get("dateModified", "N/A"):
+            record = DrinkRecord(drink)
+            if drink.get("idDrink"):
+                drink_cache[record.id] = record
+        records.append(record)
+    return records
+
+
+async def get_drink_by_id(cocktail_id: str) -> Optional[DrinkRecord]:
+    """Returns a drink from the cache, falling back to lookup.php."""
+    drink = drink_cache.get(cocktail_id)
+    if drink is not None:
+        return drink
+    if mapped_catalog is not None:
+        row = mapped_catalog.row_for_id(cocktail_id)
+        if row is not None:
+            return cache_drinks([mapped_catalog.drink(row)])[0]
+    # Not in the snapshot, possibly added upstream since the image was built
+    async with lookup_semaphore:
+        data = await make_cocktaildb_request("lookup.php", params={"i": cocktail_id})
+    if data and data.get("drinks"):
+        return cache_drinks(data["drinks"])[0]
+    return None
+
+
+async def refill_random_reservoir() -> None:
+    """Tops the random reservoir back up to RANDOM_RESERVOIR_SIZE drinks."""
+    while len(random_reservoir) < RANDOM_RESERVOIR_SIZE:
+        try:
+            data = await make_cocktaildb_request("random.php")
+        except CocktailDBUnavailable:
+            data = None
+        if not (data and data.get("drinks")):
+            # Upstream unavailable, retry on the next scheduled refill
+            return
+        random_reservoir.append(cache_drinks(data["drinks"])[0])
+
+
+def schedule_random_refill() -> None:
+    """Starts a background reservoir refill unless one is already running."""
+    global random_refill_task
+    if random_refill_task is None or random_refill_task.done():
+        random_refill_task = asyncio.create_task(refill_random_reservoir())
+
+
+def format_cocktail_summary(drink: DrinkRecord) -> str:
+    """Formats a drink record into a readable summary string."""
     return (
-        f"ID: {drink.get('idDrink', 'N/A')}\n"
-        f"Name: {drink.get('strDrink', 'N/A')}\n"
-        f"Category: {drink.get('strCategory', 'N/A')}\n"
-        f"Glass: {drink.get('strGlass', 'N/A')}\n"
-        f"Alcoholic: {drink.get('strAlcoholic', 'N/A')}\n"
-        f"Instructions: {drink.get('strInstructions', 'N/A')[:150]}...\n"
-        f"Thumbnail: {drink.get('strDrinkThumb', 'N/A')}"
+        f"ID: {drink.id}\n"
+        f"Name: {drink.name}\n"
+        f"Category: {drink.category}\n"
+        f"Glass: {drink.glass}\n"
+        f"Alcoholic: {drink.alcoholic}\n"
+        f"Instructions: {str(drink.instructions)[:150]}...\n"
+        f"Thumbnail: {drink.thumbnail}"
     )
 
 
-def format_cocktail_details(drink: Dict[str, Any]) -> str:
-    """Formats a cocktail dictionary into a detailed readable string."""
+def drink_features(drink: DrinkRecord) -> Dict[str, float]:
+    """Maps a drink to its weighted ingredient, category and glass features."""
+    features = {
+        f"ingredient:{name.lower()}": INGREDIENT_WEIGHT
+        for name in drink.ingredient_names
+    }
+    for value, prefix in ((drink.category, "category"), (drink.glass, "glass")):
+        if value and value != "N/A":
+            features[f"{prefix}:{value.strip().lower()}"] = STYLE_WEIGHT
+    return features
+
+
+class SimilarityIndex:
+    """Precomputed drink feature matrix for vectorized similarity queries.
+
+    Rows are drinks and columns are ingredient, category and glass features.
+    Cosine similarity uses the weighted rows; Jaccard similarity uses the
+    binary presence of each feature.
+    """
+
+    def __init__(self, drinks: List[DrinkRecord]):
+        self.drinks = drinks
+        self.row_by_id = {drink.id: row for row, drink in enumerate(drinks)}
+        features = [drink_features(drink) for drink in drinks]
+        self.columns = {
+            name: col
+            for col, name in enumerate(sorted({f for fs in features for f in fs}))
+        }
+
+        self.weights = np.zeros((len(drinks), len(self.columns)), dtype=np.float32)
+        for row, drink_feats in enumerate(features):
+            for name, weight in drink_feats.items():
+                self.weights[row, self.columns[name]] = weight
+        norms = np.linalg.norm(self.weights, axis=1, keepdims=True)
+        self.unit = self.weights / np.maximum(norms, 1e-9)
+        self.binary = (self.weights > 0).astype(np.float32)
+        self.sizes = self.binary.sum(axis=1)
+
+    def vectorize(self, drink: DrinkRecord) -> np.ndarray:
+        """Builds a weighted feature row, ignoring features outside the index."""
+        vector = np.zeros(len(self.columns), dtype=np.float32)
+        for name, weight in drink_features(drink).items():
+            col = self.columns.get(name)
+            if col is not None:
+                vector[col] = weight
+        return vector
+
+    def most_similar(
+        self, drink: DrinkRecord, top_k: int, metric: str
+    ) -> List[Tuple[DrinkRecord, float]]:
+        """Returns up to top_k (drink, score) pairs, best match first."""
+        row = self.row_by_id.get(drink.id)
+        vector = self.weights[row] if row is not None else self.vectorize(drink)
+
+        if metric == "jaccard":
+            present = (vector > 0).astype(np.float32)
+            overlap = self.binary @ present
+            union = self.sizes + present.sum() - overlap
+            scores = overlap / np.maximum(union, 1.0)
+        else:
+            norm = np.linalg.norm(vector)
+            scores = self.unit @ (vector / max(norm, 1e-9))
+
+        if row is not None:
+            scores[row] = -np.inf  # Never recommend the drink itself
+        top_k = min(top_k, len(self.drinks) - (row is not None))
+        if top_k <= 0:
+            return []
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+        return [(self.drinks[i], float(scores[i])) for i in best if scores[i] > 0]
+
+
+def catalog_drinks(rows: List[int]) -> List[DrinkRecord]:
+    """Returns the records for rows of the mapped catalog."""
+    records = []
+    for row in rows:
+        # Only decode the mapped payload the first time a drink is touched
+        record = drink_cache.get(mapped_catalog.drink_id(row))
+        if record is None:
+            record = cache_drinks([mapped_catalog.drink(row)])[0]
+        records.append(record)
+    return records
+
+
+async def load_catalog() -> List[DrinkRecord]:
+    """Returns every drink, from the mapped catalog or from the API.
+
+    Without a catalog snapshot, each possible first character is listed
+    through search.php.
+
+    Raises:
+        CocktailDBUnavailable: A page failed to load, so the catalog would be
+            incomplete. Drinks of the pages that loaded are still cached.
+    """
+    if mapped_catalog is not None:
+        return catalog_drinks(list(range(len(mapped_catalog))))
+
+    async def fetch(first: str) -> List[Dict[str, Any]]:
+        async with lookup_semaphore:
+            data = await make_cocktaildb_request("search.php", params={"f": first})
+        return data["drinks"] if data and data.get("drinks") else []
+
+    pages = await asyncio.gather(
+        *(fetch(first) for first in string.ascii_lowercase + string.digits),
+        return_exceptions=True,
+    )
+    failures = [page for page in pages if isinstance(page, BaseException)]
+    for failure in failures:
+        if not isinstance(failure, CocktailDBUnavailable):
+            raise failure
+    cache_drinks([drink for page in pages if isinstance(page, list) for drink in page])
+    if failures:
+        raise CocktailDBUnavailable(
+            f"{len(failures)} of {len(pages)} catalog pages failed to load"
+        ) from failures[0]
+    return cache_drinks([drink for page in pages for drink in page])
+
+
+async def get_similarity_index() -> Optional[SimilarityIndex]:
+    """Returns the similarity index, building it on first use.
+
+    The index is only kept when the whole catalog loaded. After a failed
+    load, None is returned without contacting the API until the retry
+    delay, doubled after each consecutive failure, has passed.
+    """
+    global similarity_index, catalog_failures, catalog_retry_at
+    if similarity_index is None and time.monotonic() < catalog_retry_at:
+        return None
+    async with catalog_lock:
+        if similarity_index is None and time.monotonic() >= catalog_retry_at:
+            try:
+                drinks = await load_catalog()
+            except CocktailDBUnavailable as e:
+                delay = min(
+                    CATALOG_RETRY_BASE_SECONDS * 2**catalog_failures,
+                    CATALOG_RETRY_MAX_SECONDS,
+                )
+                catalog_failures += 1
+                catalog_retry_at = time.monotonic() + delay
+                print(f"Catalog load failed ({e}), retrying in {delay:.0f} seconds")
+                return None
+            catalog_failures = 0
+            if drinks:
+                similarity_index = SimilarityIndex(drinks)
+    return similarity_index
+
+
+def format_cocktail_listing(drink: DrinkRecord) -> str:
+    """Formats a drink record into a single name and ID line."""
+    return f"{drink.name} (ID: {drink.id})"
+
+
+def format_drink_page(
+    header: str,
+    drinks: List[DrinkRecord],
+    limit: int,
+    cursor: Optional[str],
+    compact: bool,
+) -> str:
+    """Formats one page of drinks within MAX_RESPONSE_BYTES.
+
+    The cursor is the offset of the first drink on the page. The footer carries
+    the cursor for the next page when more drinks remain, either because the
+    page limit or the byte budget was reached.
+    """
+    if cursor is not None and not cursor.isdigit():
+        return "Invalid input: cursor must be a value returned by a previous call."
+    start = int(cursor) if cursor else 0
+    if start >= len(drinks):
+        return f"No more results: there are {len(drinks)} cocktails in total."
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    separator = "\n" if compact else "\n---\n"
+    budget = MAX_RESPONSE_BYTES - 100  # Leave room for the paging footer
+    sections = [header]
+    used = len(header.encode())
+    for drink in drinks[start : start + limit]:
+        section = format_cocktail_listing(drink) if compact else drink.summary
+        size = len(separator) + len(section.encode())
+        # Always show at least one drink so a page can make progress
+        if len(sections) > 1 and used + size > budget:
+            break
+        sections.append(section)
+        used += size
+
+    end = start + len(sections) - 1
+    footer = f"Showing {start + 1}-{end} of {len(drinks)} cocktails."
+    if end < len(drinks):
+        footer += f" For more results, call again with cursor='{end}'."
+    sections.append(footer)
+    return separator.join(sections)
+
+
+def format_cocktail_details(drink: DrinkRecord) -> str:
+    """Formats a drink record into a detailed readable string."""
     details = [
-        f"ID: {drink.get('idDrink', 'N/A')}",
-        f"Name: {drink.get('strDrink', 'N/A')}",
-        f"Alternate Name: {drink.get('strDrinkAlternate', 'None')}",
-        f"Tags: {drink.get('strTags', 'None')}",
-        f"Category: {drink.get('strCategory', 'N/A')}",
-        f"IBA Category: {drink.get('strIBA', 'None')}",
-        f"Alcoholic: {drink.get('strAlcoholic', 'N/A')}",
-        f"Glass: {drink.get('strGlass', 'N/A')}",
-        f"Instructions: {drink.get('strInstructions', 'N/A')}",
+        f"ID: {drink.id}",
+        f"Name: {drink.name}",
+        f"Alternate Name: {drink.alternate_name}",
+        f"Tags: {drink.tags}",
+        f"Category: {drink.category}",
+        f"IBA Category: {drink.iba}",
+        f"Alcoholic: {drink.alcoholic}",
+        f"Glass: {drink.glass}",
+        f"Instructions: {drink.instructions}",
     ]
-    ingredients = []
-    for i in range(1, 16):
-        ingredient = drink.get(f"strIngredient{i}")
-        measure = drink.get(f"strMeasure{i}")
-        if ingredient:
-            ingredients.append(
-                f"- {measure.strip() if measure else ''} {ingredient.strip()}".strip()
-            )
-    if ingredients:
+    if drink.ingredients:
         details.append("\nIngredients:")
-        details.extend(ingredients)
+        details.extend(
+            f"- {measure} {ingredient}".strip()
+            for ingredient, measure in drink.ingredients
+        )
 
-    details.append(f"\nImage URL: {drink.get('strDrinkThumb', 'N/A')}")
-    details.append(f"Last Modified: {drink.get('dateModified', 'N/A')}")
+    details.append(f"\nImage URL: {drink.thumbnail}")
+    details.append(f"Last Modified: {drink.date_modified}")
 
     return "\n".join(details)
 
@@ -119,36 +512,66 @@ def format_ingredient(ingredient: Dict[str, Any]) -> str:
 
 
 @mcp.tool()
-async def search_cocktail_by_name(name: str) -> str:
+async def search_cocktail_by_name(
+    name: str,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    compact: bool = False,
+) -> str:
     """Searches for cocktails by name.
 
     Args:
         name: The name of the cocktail to search for (e.g., margarita).
+        limit: Maximum number of cocktails to return (1-50).
+        cursor: Cursor from a previous response to fetch the next page.
+        compact: If true, list only cocktail names and IDs.
     """
+    if mapped_catalog is not None:
+        rows = mapped_catalog.rows_matching_name(name.strip())
+        if rows:
+            return format_drink_page(
+                "Found cocktails:", catalog_drinks(rows), limit, cursor, compact
+            )
     data = await make_cocktaildb_request("search.php", params={"s": name})
     if data and data.get("drinks"):
-        drinks = data["drinks"]
-        response_lines = ["Found cocktails:"]
-        response_lines.extend([format_cocktail_summary(drink) for drink in drinks])
-        return "\n---\n".join(response_lines)
+        drinks = cache_drinks(data["drinks"])
+        return format_drink_page("Found cocktails:", drinks, limit, cursor, compact)
     return "No cocktails found with that name."
 
 
 @mcp.tool()
-async def list_cocktails_by_first_letter(letter: str) -> str:
+async def list_cocktails_by_first_letter(
+    letter: str,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    compact: bool = False,
+) -> str:
     """Lists all cocktails starting with a specific letter.
 
     Args:
         letter: The first letter to search cocktails by (must be a single character).
+        limit: Maximum number of cocktails to return (1-50).
+        cursor: Cursor from a previous response to fetch the next page.
+        compact: If true, list only cocktail names and IDs.
     """
     if len(letter) != 1 or not letter.isalpha():
         return "Invalid input: Please provide a single letter."
-    data = await make_cocktaildb_request("search.php", params={"f": letter.lower()})
-    if data and data.get("drinks"):
-        drinks = data["drinks"]
-        response_lines = [f"Cocktails starting with '{letter.upper()}':"]
-        response_lines.extend([format_cocktail_summary(drink) for drink in drinks])
-        return "\n---\n".join(response_lines)
+    drinks = []
+    if mapped_catalog is not None:
+        drinks = catalog_drinks(mapped_catalog.rows_with_name_prefix(letter))
+    if not drinks:
+        data = await make_cocktaildb_request(
+            "search.php", params={"f": letter.lower()}
+        )
+        drinks = cache_drinks(data["drinks"]) if data and data.get("drinks") else []
+    if drinks:
+        return format_drink_page(
+            f"Cocktails starting with '{letter.upper()}':",
+            drinks,
+            limit,
+            cursor,
+            compact,
+        )
     return f"No cocktails found starting with the letter '{letter.upper()}'"
 
 
@@ -169,10 +592,21 @@ async def search_ingredient_by_name(name: str) -> str:
 @mcp.tool()
 async def list_random_cocktails() -> str:
     """Looks up a single random cocktail."""
+    if mapped_catalog is not None and len(mapped_catalog):
+        # Uniform over the snapshot, no upstream round trip
+        row = random.randrange(len(mapped_catalog))
+        return catalog_drinks([row])[0].details
+
+    if random_reservoir:
+        drink = random_reservoir.popleft()
+        schedule_random_refill()
+        return drink.details
+
+    # Reservoir is cold or drained: answer directly and refill behind us
+    schedule_random_refill()
     data = await make_cocktaildb_request("random.php")
     if data and data.get("drinks"):
-        drink = data["drinks"][0]
-        return format_cocktail_details(drink)
+        return cache_drinks(data["drinks"])[0].details
     return "Could not fetch a random cocktail."
 
 
@@ -187,20 +621,151 @@ async def lookup_cocktail_details_by_id(cocktail_id: str) -> str:
     if not cocktail_id.isdigit():
         return "Invalid input: Cocktail ID must be a number."
 
-    data = await make_cocktaildb_request("lookup.php", params={"i": cocktail_id})
-    if data and data.get("drinks"):
-        drink = data["drinks"][0]
-        return format_cocktail_details(drink)
+    drink = await get_drink_by_id(cocktail_id)
+    if drink:
+        return drink.details
     return f"No cocktail found with ID {cocktail_id}."
 
 
+@mcp.tool()
+async def lookup_cocktails_by_ids(
+    cocktail_ids: List[str], max_chars: Optional[int] = None
+) -> str:
+    """Looks up the full details of several cocktails by their IDs in one call.
+
+    Prefer this over repeated lookup_cocktail_details_by_id calls after a list
+    or search.
+
+    Args:
+        cocktail_ids: The unique IDs of the cocktails (e.g., ["11007", "11000"]).
+        max_chars: Optional cap on the response length in characters. Drinks
+            that do not fit are listed by ID so they can be requested again.
+    """
+    # Drop duplicates while keeping the caller's order
+    ids = list(dict.fromkeys(cid.strip() for cid in cocktail_ids))
+    if not ids:
+        return "Invalid input: Please provide at least one cocktail ID."
+    if len(ids) > MAX_BATCH_IDS:
+        return f"Invalid input: At most {MAX_BATCH_IDS} cocktail IDs per call."
+    invalid = [cid for cid in ids if not cid.isdigit()]
+    if invalid:
+        return f"Invalid input: Cocktail IDs must be numbers: {', '.join(invalid)}"
+
+    # Cache hits resolve immediately; misses share the bounded semaphore. A
+    # failed upstream fetch only affects its own ID
+    drinks = await asyncio.gather(
+        *(get_drink_by_id(cid) for cid in ids), return_exceptions=True
+    )
+    failures = [drink for drink in drinks if isinstance(drink, BaseException)]
+    for failure in failures:
+        if not isinstance(failure, CocktailDBUnavailable):
+            raise failure
+    if failures and len(failures) == len(drinks):
+        raise failures[0]
+
+    sections = []
+    omitted = []
+    used = 0
+    for cocktail_id, drink in zip(ids, drinks):
+        if isinstance(drink, CocktailDBUnavailable):
+            section = (
+                f"Could not fetch the cocktail with ID {cocktail_id}, "
+                "TheCocktailDB is unavailable. Please try again later."
+            )
+        elif drink:
+            section = drink.details
+        else:
+            section = f"No cocktail found with ID {cocktail_id}."
+        if omitted or (
+            max_chars is not None and sections and used + len(section) > max_chars
+        ):
+            omitted.append(cocktail_id)
+            continue
+        sections.append(section)
+        used += len(section)
+    if omitted:
+        sections.append(
+            f"Omitted to respect the size limit, request again: {', '.join(omitted)}"
+        )
+    return "\n---\n".join(sections)
+
+
+@mcp.tool()
+async def find_similar_cocktails(
+    cocktail_id: str, top_k: int = 5, metric: str = "cosine"
+) -> str:
+    """Finds the cocktails most similar to a given cocktail.
+
+    Similarity is based on shared ingredients, category and glass. Use this
+    for requests like "something like a Negroni".
+
+    Args:
+        cocktail_id: The unique ID of the reference cocktail (e.g., 11003).
+        top_k: Number of similar cocktails to return (1-20).
+        metric: Similarity measure, either "cosine" or "jaccard".
+    """
+    if not cocktail_id.isdigit():
+        return "Invalid input: Cocktail ID must be a number."
+    metric = metric.lower()
+    if metric not in ("cosine", "jaccard"):
+        return "Invalid input: metric must be 'cosine' or 'jaccard'."
+    top_k = max(1, min(top_k, MAX_SIMILAR_RESULTS))
+
+    index = await get_similarity_index()
+    if index is None:
+        return (
+            "The cocktail catalog for similarity search is unavailable right "
+            "now. Please try again later."
+        )
+    drink = await get_drink_by_id(cocktail_id)
+    if not drink:
+        return f"No cocktail found with ID {cocktail_id}."
+
+    matches = index.most_similar(drink, top_k, metric)
+    if not matches:
+        return f"No cocktails similar to {drink.name} found."
+
+    reference = {name.lower() for name in drink.ingredient_names}
+    lines = [f"Cocktails similar to {format_cocktail_listing(drink)}:"]
+    for match, score in matches:
+        shared = [i for i in match.ingredient_names if i.lower() in reference]
+        lines.append(
+            f"- {format_cocktail_listing(match)}, similarity {score:.2f}, "
+            f"shared ingredients: {', '.join(shared) if shared else 'none'}"
+        )
+    return "\n".join(lines)
+
+
 # --- Add shutdown event to close client (like weather server) ---
 async def shutdown_event():
     """Gracefully close the shared httpx client."""
     await http_client.aclose()
 
 
+async def advertise_tool_schema_version():
+    """Reports a hash of the tool schemas as the MCP server version.
+
+    Agents key their cached tool lists on this version, so they only list
+    tools again after a deploy that changed them.
+    """
+    tools = await mcp.get_tools()
+    schemas = sorted(tool.to_mcp_tool().model_dump_json() for tool in tools.values())
+    digest = hashlib.sha256("\n".join(schemas).encode()).hexdigest()[:16]
+    mcp._mcp_server.version = f"tools-{digest}"
+
+
+async def main():
+    """Warms the random reservoir and catalog, then serves MCP over HTTP."""
+    await advertise_tool_schema_version()
+    if mapped_catalog is None:
+        schedule_random_refill()
+    # Keep a reference so the catalog build is not garbage collected mid-flight
+    catalog_task = asyncio.create_task(get_similarity_index())
+    await mcp.run_async(transport="streamable-http", host="0.0.0.0", port=8080)
+    catalog_task.cancel()
+
+
 # --- Run Server ---
 if __name__ == "__main__":
     # This now works because asyncio is imported
-    asyncio.run(mcp.run_async(transport="streamable-http", host="0.0.0.0", port=8080))
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
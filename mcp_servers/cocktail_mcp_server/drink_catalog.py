@@ -0,0 +1,248 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Compact, memory-mapped drink catalog for fast cocktail server cold starts.
+
+The catalog file holds every drink payload plus sorted ID and name indexes.
+The server memory-maps it read-only at startup, so lookups never wait on
+TheCocktailDB, no index is rebuilt, and every worker process on the host
+shares the same page-cache pages.
+
+File layout (little endian):
+    header   magic b"DRINKCAT", version u32, section count u32,
+             then (offset u64, length u64) per section
+    sections string tables (count u32, count + 1 offsets u32, data) or
+             u32 arrays, in the order of the SECTIONS tuple
+
+Usage:
+    # Build from the live API (or any COCKTAILDB_BASE_URL stand-in)
+    python drink_catalog.py build --out drink_catalog.bin
+
+    # Build from a recorded fixture
+    python drink_catalog.py build --out drink_catalog.bin --from-json fixture.json
+"""
+
+import argparse
+import asyncio
+import bisect
+import json
+import mmap
+import os
+import string
+import struct
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+MAGIC = b"DRINKCAT"
+VERSION = 2
+SECTIONS = (
+    "drinks",  # JSON payload per drink, ordered by numeric idDrink
+    "ids",  # u32 idDrink per drink row
+    "names",  # Lowercased drink names, sorted
+    "name_rows",  # u32 drink row for each sorted name
+)
+_HEADER = struct.Struct("<8sII")
+_SECTION = struct.Struct("<QQ")
+_U32 = struct.Struct("<I")
+
+
+class _UInt32Array:
+    """Read-only u32 array view over a buffer, usable with bisect."""
+
+    def __init__(self, buf: memoryview):
+        self._buf = buf
+
+    def __len__(self) -> int:
+        return len(self._buf) // 4
+
+    def __getitem__(self, index: int) -> int:
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return _U32.unpack_from(self._buf, index * 4)[0]
+
+
+class _StringTable:
+    """Read-only table of byte strings over a buffer, usable with bisect."""
+
+    def __init__(self, buf: memoryview):
+        (self._count,) = _U32.unpack_from(buf, 0)
+        self._offsets = _UInt32Array(buf[4 : 4 + 4 * (self._count + 1)])
+        self._data = buf[4 + 4 * (self._count + 1) :]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> bytes:
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return bytes(self._data[self._offsets[index] : self._offsets[index + 1]])
+
+
+def _pack_strings(items: List[bytes]) -> bytes:
+    offsets = [0]
+    for item in items:
+        offsets.append(offsets[-1] + len(item))
+    header = struct.pack(f"<{len(offsets) + 1}I", len(items), *offsets)
+    return header + b"".join(items)
+
+
+def _pack_u32(values: List[int]) -> bytes:
+    return struct.pack(f"<{len(values)}I", *values)
+
+
+def write_catalog(drinks: List[Dict[str, Any]], path: str) -> None:
+    """Serializes drink payloads and their indexes into a catalog file."""
+    unique = {drink["idDrink"]: drink for drink in drinks if drink.get("idDrink")}
+    ordered = sorted(unique.values(), key=lambda drink: int(drink["idDrink"]))
+
+    names = sorted(
+        ((drink.get("strDrink") or "").lower().encode(), row)
+        for row, drink in enumerate(ordered)
+    )
+
+    sections = [
+        _pack_strings(
+            [json.dumps(drink, separators=(",", ":")).encode() for drink in ordered]
+        ),
+        _pack_u32([int(drink["idDrink"]) for drink in ordered]),
+        _pack_strings([name for name, _ in names]),
+        _pack_u32([row for _, row in names]),
+    ]
+
+    offset = _HEADER.size + _SECTION.size * len(sections)
+    table = []
+    for section in sections:
+        offset += -offset % 4  # Keep every section 4-byte aligned
+        table.append((offset, len(section)))
+        offset += len(section)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(sections)))
+        for entry in table:
+            f.write(_SECTION.pack(*entry))
+        for (start, _), section in zip(table, sections):
+            f.write(b"\0" * (start - f.tell()))
+            f.write(section)
+    os.replace(tmp_path, path)
+
+
+class MappedCatalog:
+    """Read-only, memory-mapped view of a catalog file written by write_catalog."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(self._mmap)
+        magic, version, count = _HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or version != VERSION or count != len(SECTIONS):
+            raise ValueError(f"{path} is not a version {VERSION} drink catalog")
+
+        views = {}
+        for i, name in enumerate(SECTIONS):
+            start, length = _SECTION.unpack_from(buf, _HEADER.size + i * _SECTION.size)
+            views[name] = buf[start : start + length]
+        self._drinks = _StringTable(views["drinks"])
+        self._ids = _UInt32Array(views["ids"])
+        self._names = _StringTable(views["names"])
+        self._name_rows = _UInt32Array(views["name_rows"])
+
+    def __len__(self) -> int:
+        return len(self._drinks)
+
+    def drink_id(self, row: int) -> str:
+        """Returns the idDrink stored at a row, without decoding the payload."""
+        return str(self._ids[row])
+
+    def drink(self, row: int) -> Dict[str, Any]:
+        """Decodes the drink payload stored at a row."""
+        return json.loads(self._drinks[row])
+
+    def row_for_id(self, cocktail_id: str) -> Optional[int]:
+        """Returns the row of a drink ID, by binary search over the ID index."""
+        if not cocktail_id.isdigit():
+            return None
+        target = int(cocktail_id)
+        row = bisect.bisect_left(self._ids, target)
+        if row < len(self._ids) and self._ids[row] == target:
+            return row
+        return None
+
+    def rows_with_name_prefix(self, prefix: str) -> List[int]:
+        """Returns rows of drinks whose name starts with prefix, in name order."""
+        key = prefix.lower().encode()
+        rows = []
+        index = bisect.bisect_left(self._names, key)
+        while index < len(self._names) and self._names[index].startswith(key):
+            rows.append(self._name_rows[index])
+            index += 1
+        return rows
+
+    def rows_matching_name(self, text: str) -> List[int]:
+        """Returns rows of drinks whose name contains text, in name order."""
+        key = text.lower().encode()
+        # Substring matches cannot use the sort order; a scan over a few
+        # hundred mapped names is still well under a millisecond
+        return [
+            self._name_rows[index]
+            for index in range(len(self._names))
+            if key in self._names[index]
+        ]
+
+
+async def fetch_drinks(base_url: str) -> List[Dict[str, Any]]:
+    """Fetches every drink by listing each possible first character."""
+    async with httpx.AsyncClient(base_url=base_url, timeout=30.0) as client:
+
+        async def fetch(first: str) -> List[Dict[str, Any]]:
+            response = await client.get("search.php", params={"f": first})
+            response.raise_for_status()
+            data = response.json()
+            return (data.get("drinks") or []) if isinstance(data, dict) else []
+
+        pages = await asyncio.gather(
+            *(fetch(first) for first in string.ascii_lowercase + string.digits)
+        )
+    return [drink for page in pages for drink in page]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Build a catalog file")
+    build.add_argument("--out", required=True)
+    build.add_argument(
+        "--from-json", help="Fixture with a 'drinks' list, instead of the API"
+    )
+    build.add_argument(
+        "--base-url",
+        default=os.getenv(
+            "COCKTAILDB_BASE_URL", "https://www.thecocktaildb.com/api/json/v1/1/"
+        ),
+    )
+    args = parser.parse_args()
+
+    if args.from_json:
+        with open(args.from_json) as f:
+            drinks = json.load(f)["drinks"]
+    else:
+        drinks = asyncio.run(fetch_drinks(args.base_url))
+    if not drinks:
+        raise SystemExit("No drinks fetched, refusing to write an empty catalog")
+    write_catalog(drinks, args.out)
+    print(f"Wrote {len(MappedCatalog(args.out))} drinks to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
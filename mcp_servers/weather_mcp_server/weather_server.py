@@ -13,6 +13,7 @@
 # limitations under the License.
 # Author: Dave Wang
 
+import hashlib
 import json
 from typing import Any, Dict, Optional
 
@@ -243,6 +244,24 @@ async def shutdown_event() -> None:
     # print("HTTP client closed.") # Optional print statement if desired
 
 
+async def advertise_tool_schema_version() -> None:
+    """Report a hash of the tool schemas as the MCP server version.
+
+    Agents cache tool lists per server version and only list tools again when
+    a deploy changes the hash.
+    """
+    tools = await mcp.get_tools()
+    schemas = sorted(tool.to_mcp_tool().model_dump_json() for tool in tools.values())
+    digest = hashlib.sha256("\n".join(schemas).encode()).hexdigest()[:16]
+    mcp._mcp_server.version = f"tools-{digest}"
+
+
+async def main() -> None:
+    """Advertise the tool schema version, then serve MCP over HTTP."""
+    await advertise_tool_schema_version()
+    await mcp.run_async(transport="streamable-http", host="0.0.0.0", port=8080)
+
+
 if __name__ == "__main__":
     # mcp.run(transport="sse")
-    asyncio.run(mcp.run_async(transport="streamable-http", host="0.0.0.0", port=8080))
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file